@@ -113,6 +113,8 @@ def get_totals_pct (candidate, max_points):
 
 # Create a candidate object
 class Candidate:
+    __slots__ = ('id', 'name', 'party', 'is_winner', 'votes', 'total')
+
     def __init__(self, u_id, name, party):
         self.id = u_id
         self.name = name
@@ -339,7 +341,7 @@ class Election:
             self.reset_pool()
             self.ballots.append([])
 
-            if show_output == 'y':
+            if show_output is True:
                 print(f'\nNew Ballot {self.ballots[i]}')
                 print(f'Voter {i} is voting...')
 
@@ -352,7 +354,8 @@ class Election:
                     print(f'Voter {i} voted {p_str} for Candidate ID: {candidate_chosen}')
 
             # Display ballot for voter
-            print(f'Voter {i} ballot: {self.ballots[i]}')
+            if show_output is True:
+                print(f'Voter {i} ballot: {self.ballots[i]}')
 
     # Mark candidate on ballot.
     def mark_candidate (self):
@@ -383,8 +386,7 @@ class Election:
     # Tally votes and store based on voter choice.
     def tally (self):
         print('\nTallying votes...')
-        if show_output == 'y':
-            print('\nTallying votes...')
+        if show_output is True:
             print(self.ballots)
 
         for i in range (0, len(self.ballots)):
@@ -560,16 +562,19 @@ class CandidateEliminationSystem(VotingSystem):
 
         for i in range (0, len(self.ballots)):
             if self.ballots[i][choice] == loser.id:
-                print(f'Voter {i} voted for loser {loser.id} at {place_str(choice, "p")}')
+                if show_output is True:
+                    print(f'Voter {i} voted for loser {loser.id} at {place_str(choice, "p")}')
+
                 if next_choice < max_choices:
                     next_choice_voted_id = self.ballots[i][next_choice]
-                    print('Next choice voted candidate ID:', next_choice_voted_id)
+                    if show_output is True:
+                        print('Next choice voted candidate ID:', next_choice_voted_id)
 
                     if next_choice_voted_id != no_vote_val:
                         next_choice_index = map_id_to_candidate_index(next_choice_voted_id, self.candidates)
                         self.candidates[next_choice_index].total += 1
                         #print('Incremented total for ', vars(self.candidates[next_choice_index]))
-                    else:
+                    elif show_output is True:
                         print(f'Voter {i} did not vote for {place_str(choice, "p")}.')
 
     # If two candidates have the same min/max values, break the tie by looking at the next place voted for count.
@@ -718,8 +723,9 @@ class NextChoiceSystem(VotingSystem):
                 if voted_id != no_vote_val:
                     index = map_id_to_candidate_index(voted_id, self.candidates)
                     self.candidates[index].total += 1
-                    print('Round:', round_num, ' Voted ID:', voted_id, 'Total:', self.candidates[index].total)
-                else:
+                    if show_output is True:
+                        print('Round:', round_num, ' Voted ID:', voted_id, 'Total:', self.candidates[index].total)
+                elif show_output is True:
                     print(f'Voter {i} did not vote for {place_str(0, "p")}.')
 
             # After tallying "new" totals if there is still no majority, get the least voted candidate.
@@ -742,40 +748,48 @@ class NextChoiceSystem(VotingSystem):
         for i in range (0, len(self.ballots)):
             for j in range(len(self.ballots[i]) - 1, -1, -1):
                 if self.ballots[i][j] == loser.id:
-                    print('* Removing loser from ballot:', loser.id)
                     self.ballots[i].pop(j)
-                    print('After removal:', self.ballots[i])
 
-        print('Ballots after removal:', self.ballots)
+                    if show_output is True:
+                        print('* Removing loser from ballot:', loser.id)
+                        print('After removal:', self.ballots[i])
+
+        if show_output is True:
+            print('Ballots after removal:', self.ballots)
 
 
 # Run program
-benchmark_id = uid(6)
-print(f'\nStart Benchmark ID: {benchmark_id}')
-
-elect = Election()
-elect.register()
-#elect.register_auto()
-elect.vote()
-elect.tally()
-
-# Get scores and determine winner for Alaska system.
-ces_candidates = elect.candidates
-ces = CandidateEliminationSystem(ces_candidates, elect.ballots)
-ces.count_ballots()
-
-# Get scores and determine winner for alternative system: Weighted Voting System.
-weight_candidates = elect.candidates
-weight = WeightedVotingSystem(weight_candidates, elect.ballots)
-weight.count_ballots()
-
-# Get scores and determine winner for alternative system: Next Choice System.
-ncs_candidates = elect.candidates
-ncs = NextChoiceSystem(ncs_candidates, elect.ballots)
-ncs.count_ballots()
-
-# Show Results
-elect.show_results(ces.candidates, weight.candidates, ncs.candidates)
-print(f'End Benchmark ID: {benchmark_id}')
+def main():
+    benchmark_id = uid(6)
+    print(f'\nStart Benchmark ID: {benchmark_id}')
+
+    elect = Election()
+    elect.register()
+    #elect.register_auto()
+    elect.vote()
+    elect.tally()
+
+    # Get scores and determine winner for Alaska system.
+    ces_candidates = elect.candidates
+    ces = CandidateEliminationSystem(ces_candidates, elect.ballots)
+    ces.count_ballots()
+
+    # Get scores and determine winner for alternative system: Weighted Voting System.
+    weight_candidates = elect.candidates
+    weight = WeightedVotingSystem(weight_candidates, elect.ballots)
+    weight.count_ballots()
+
+    # Get scores and determine winner for alternative system: Next Choice System.
+    ncs_candidates = elect.candidates
+    ncs = NextChoiceSystem(ncs_candidates, elect.ballots)
+    ncs.count_ballots()
+
+    # Show Results
+    elect.show_results(ces.candidates, weight.candidates, ncs.candidates)
+    print(f'End Benchmark ID: {benchmark_id}')
+
+
+if __name__ == '__main__':
+    main()
 
 # End of program
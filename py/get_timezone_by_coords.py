@@ -8,7 +8,6 @@ import json
 import requests
 import mysql.connector
 import time
-import timeit
 
 # define key
 api_key = "" # put API key here
@@ -105,7 +104,7 @@ def update_sql():
 
 # MAIN PROCESS
 
-start_time = time.time()
+start_time = time.perf_counter()
 lines = []
 request_count = 0
 max_requests_per_minute = 2000  # Adjust based on API limits
@@ -136,8 +135,6 @@ for chunk in get_all_coords():
 #output_sql(lines)
 print(f"✅ {len(lines)} update statements written to {file_name}.")
 
-end_time = time.time()
+end_time = time.perf_counter()
 elapsed_time = end_time - start_time
-time_str = timeit.timeit('1 + 1', number=1000000)
-print(f"Time taken: {time_str:.6f} seconds")
-print(f"Total seconds: {elapsed_time}")  # Get total time in seconds
+print(f"Time taken: {elapsed_time:.6f} seconds")  # Get total time in seconds
@@ -12,6 +12,7 @@
 | - Redistribution: 25%
 """
 
+from events import log
 from helpers import PERCENTILE, FIRST_CHOICE_INDEX
 from voting_sys import VotingSystem
 
@@ -33,11 +34,12 @@ class AllVotingWeightedSystem():
         vote_sys.title = self.title
         vote_sys.show_banner()
 
-        print(
-            'Weights: Popular:', self.popular_weight * PERCENTILE,
-            'Weighted Score:', self.weighted_score_weight * PERCENTILE,
-            'Remaining Candidates:', self.remaining_candidates_weight * PERCENTILE,
-            'Redistribution:', self.redistribution_weight * PERCENTILE
+        log.info(
+            'Weights: Popular: %s Weighted Score: %s Remaining Candidates: %s Redistribution: %s',
+            self.popular_weight * PERCENTILE,
+            self.weighted_score_weight * PERCENTILE,
+            self.remaining_candidates_weight * PERCENTILE,
+            self.redistribution_weight * PERCENTILE
         )
 
     def score_ballots(self):
@@ -47,23 +49,44 @@ class AllVotingWeightedSystem():
         :return:
         """
 
+        # Each system may hold its own copy of a candidate, so add up the weighted totals by candidate ID.
+        candidates = {}
+
         for result in self.results:
+            weight = self.get_weight(result['title'])
+
             for candidate in result['candidates']:
+                if candidate.id not in candidates:
+                    candidate.sys_totals = 0
+                    candidates[candidate.id] = candidate
+
+                candidates[candidate.id].sys_totals += candidate.total * weight
+
+        # Append the candidates to the list
+        self.candidates = list(candidates.values())
+
+    def get_weight(self, title):
+        """
+        Get the weight of a voting system.
+
+        :param string title: Title of the voting system.
+
+        :return: float: Weight of the voting system's totals.
+        """
 
-                if result['title'] == 'Popular':
-                    candidate.sys_totals += candidate.total * self.popular_weight
+        if title == 'Popular':
+            return self.popular_weight
 
-                elif result['title'] == 'Weighted Score':
-                    candidate.sys_totals += candidate.total * self.weighted_score_weight
+        elif title == 'Weighted Score':
+            return self.weighted_score_weight
 
-                elif result['title'] == 'Remaining Candidates':
-                    candidate.sys_totals += candidate.total * self.remaining_candidates_weight
+        elif title == 'Remaining Candidates':
+            return self.remaining_candidates_weight
 
-                elif result['title'] == 'Redistribution':
-                    candidate.sys_totals += candidate.total * self.redistribution_weight
+        elif title == 'Redistribution':
+            return self.redistribution_weight
 
-                # Append the candidate to the list
-                self.candidates.append(candidate)
+        return 0
 
     def show_totals_by_sys(self):
 
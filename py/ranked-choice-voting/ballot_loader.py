@@ -0,0 +1,234 @@
+"""
+|--------------------------------------------------------------------------
+| Ballot Loader
+|--------------------------------------------------------------------------
+| Stream cast vote records from a file in fixed-size batches.  Each row is
+| one ballot with a candidate ID per ranked choice (blank = no vote).
+|
+| Supported formats:
+| - .csv    One ballot per line, first line is a header by default.
+| - .jsonl  One JSON array of candidate IDs per line, or an object with a
+|           "choices" array.
+| - .parquet One column per choice (needs pyarrow).
+|
+| Each batch is counted as it arrives and folded into a table of unique
+| rankings by looking its rankings up, never by re-sorting the table, so
+| memory depends on the batch size and the number of distinct rankings.  With
+| many candidates nearly every ballot is distinct; for files larger than
+| memory, load_ballots can append each batch to a binary ballot file instead
+| and map it, so memory depends on the batch size alone.
+"""
+
+# Import Libraries
+import csv
+import json
+import os
+import numpy as np
+from ballot_store import BallotFileWriter, BallotStore, RankingTable
+from helpers import MAX_CHOICES, NO_VOTE_VAL, BALLOT_CHUNK_SIZE
+
+
+def read_csv_batches(path, batch_size=BALLOT_CHUNK_SIZE, header=True):
+    """
+    Read ballots from a CSV file.
+
+    :param string path: Path to the file.
+    :param int batch_size: Ballots per batch.
+    :param bool header: Skip the first line.
+
+    :return: generator: Lists of ballots (lists of candidate IDs).
+    """
+
+    with open(path, newline='') as file:
+        reader = csv.reader(file)
+
+        if header:
+            next(reader, None)
+
+        batch = []
+        for row in reader:
+            batch.append([cell.strip() for cell in row])
+
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+
+        if len(batch) > 0:
+            yield batch
+
+
+def read_jsonl_batches(path, batch_size=BALLOT_CHUNK_SIZE):
+    """
+    Read ballots from a JSON lines file.
+
+    :param string path: Path to the file.
+    :param int batch_size: Ballots per batch.
+
+    :return: generator: Lists of ballots (lists of candidate IDs).
+    """
+
+    with open(path) as file:
+        batch = []
+        for line in file:
+            if line.strip() == '':
+                continue
+
+            ballot = json.loads(line)
+            if isinstance(ballot, dict):
+                ballot = ballot['choices']
+
+            batch.append([NO_VOTE_VAL if voted_id is None else str(voted_id) for voted_id in ballot])
+
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+
+        if len(batch) > 0:
+            yield batch
+
+
+def read_parquet_batches(path, batch_size=BALLOT_CHUNK_SIZE):
+    """
+    Read ballots from a Parquet file, one column per choice.
+
+    :param string path: Path to the file.
+    :param int batch_size: Ballots per batch.
+
+    :return: generator: Lists of ballots (lists of candidate IDs).
+    """
+
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError('Reading Parquet ballots requires pyarrow (pip install pyarrow).')
+
+    for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        columns = [column.to_pylist() for column in record_batch.columns]
+        yield [[NO_VOTE_VAL if voted_id is None else str(voted_id) for voted_id in row] for row in zip(*columns)]
+
+
+def read_batches(path, batch_size=BALLOT_CHUNK_SIZE, header=True):
+    """
+    Read ballots in batches, picking the reader by file extension.
+
+    :param string path: Path to the file.
+    :param int batch_size: Ballots per batch.
+    :param bool header: The first line of a CSV file is a header, not a ballot.
+
+    :return: generator: Lists of ballots (lists of candidate IDs).
+
+    :raises: ValueError: If the file type is not supported.
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        return read_csv_batches(path, batch_size, header)
+
+    elif extension in ('.jsonl', '.ndjson'):
+        return read_jsonl_batches(path, batch_size)
+
+    elif extension == '.parquet':
+        return read_parquet_batches(path, batch_size)
+
+    raise ValueError(f'Unsupported ballot file type: {extension}')
+
+
+def encode_batch(batch, candidate_ids, choice_cnt=MAX_CHOICES):
+    """
+    Encode a batch of ballots into a ballot store.  Each distinct candidate ID in the batch is looked up once.
+
+    :param list batch: Ballots (lists of candidate IDs).
+    :param list candidate_ids: Candidate IDs in registration order.
+    :param int choice_cnt: Number of ranked choices on each ballot.
+
+    :return: BallotStore: The encoded batch.
+
+    :raises: ValueError: If a ballot names a candidate that is not registered, or ranks more than choice_cnt choices.
+    """
+
+    store = BallotStore(candidate_ids, 0, choice_cnt)
+
+    cells = np.full((len(batch), choice_cnt), NO_VOTE_VAL, dtype=object)
+    for i, ballot in enumerate(batch):
+        # Blank cells past the ballot depth are fine; a vote there would be lost.
+        if len(ballot) > choice_cnt and any(voted_id != NO_VOTE_VAL for voted_id in ballot[choice_cnt:]):
+            raise ValueError(f'Ballot ranks more than {choice_cnt} choices: {ballot}')
+
+        cells[i, :min(len(ballot), choice_cnt)] = ballot[:choice_cnt]
+
+    voted_ids, inverse = np.unique(cells.astype(str), return_inverse=True)
+
+    lookup = np.empty(len(voted_ids), dtype=store.matrix.dtype)
+    for i, voted_id in enumerate(voted_ids):
+        if voted_id == NO_VOTE_VAL:
+            lookup[i] = store.no_vote
+
+        elif voted_id in store.codes:
+            lookup[i] = store.codes[voted_id]
+
+        else:
+            raise ValueError(f'Unknown candidate ID on ballot: {voted_id}')
+
+    store.matrix = lookup[inverse.reshape(cells.shape)]
+    store.row_cnt = len(batch)
+
+    return store
+
+
+def stream_ballots(path, candidate_ids, batch_size=BALLOT_CHUNK_SIZE, choice_cnt=MAX_CHOICES, header=True):
+    """
+    Stream a ballot file as encoded batches.
+
+    :param string path: Path to the file.
+    :param list candidate_ids: Candidate IDs in registration order.
+    :param int batch_size: Ballots per batch.
+    :param int choice_cnt: Number of ranked choices on each ballot.
+    :param bool header: The first line of a CSV file is a header, not a ballot.
+
+    :return: generator: BallotStore per batch.
+    """
+
+    for batch in read_batches(path, batch_size, header):
+        yield encode_batch(batch, candidate_ids, choice_cnt)
+
+
+def load_ballots(path, candidate_ids, batch_size=BALLOT_CHUNK_SIZE, choice_cnt=MAX_CHOICES, ballot_file=None,
+                 header=True, candidates=None):
+    """
+    Count a ballot file batch by batch.
+
+    :param string path: Path to the file.
+    :param list candidate_ids: Candidate IDs in registration order.
+    :param int batch_size: Ballots per batch.
+    :param int choice_cnt: Number of ranked choices on each ballot.
+    :param string ballot_file: Append each batch's rankings to this binary ballot file and map it, instead of keeping
+        them in memory (optional).
+    :param bool header: The first line of a CSV file is a header, not a ballot.
+    :param list candidates: Candidates in registration order, for the names and parties in the ballot file (default:
+        the bare IDs).
+
+    :return: tuple: Rank counts (candidates x choices) and a store of the unique rankings (one per batch in a ballot
+        file).
+    """
+
+    rank_counts = np.zeros((len(candidate_ids), choice_cnt), dtype=np.int64)
+    batches = stream_ballots(path, candidate_ids, batch_size, choice_cnt, header)
+
+    if ballot_file is not None:
+        with BallotFileWriter(ballot_file, candidates or candidate_ids, choice_cnt) as writer:
+            for batch in batches:
+                unique = batch.compress()
+                rank_counts += unique.rank_counts()
+                writer.append(unique)
+
+            return rank_counts, writer.close()
+
+    table = RankingTable(candidate_ids, choice_cnt)
+
+    for batch in batches:
+        unique = batch.compress()
+        rank_counts += unique.rank_counts()
+        table.add(unique)
+
+    return rank_counts, table.store
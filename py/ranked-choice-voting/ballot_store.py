@@ -0,0 +1,940 @@
+"""
+|--------------------------------------------------------------------------
+| Ballot Store
+|--------------------------------------------------------------------------
+| Compact columnar storage for ballots.  Candidate IDs are interned to small
+| integer codes (their registration index) and every ballot is one row of a
+| 2-D NumPy array (voters x choices).  Ballot depth is set per store
+| (MAX_CHOICES by default, up to MAX_BALLOT_DEPTH).  Blank choices are stored
+| as a sentinel code so a full electorate costs a few bytes per voter instead
+| of a Python list of strings per voter.
+|
+| A store can be compressed into its unique rankings with a count (weight)
+| per row.  Every count below honours the weights, so a million voters
+| tabulate as a few thousand weighted rows.
+|
+| Ballot File Format
+| ------------------
+| A store can be saved to a binary file and opened again read-only with
+| np.memmap, so any number of systems can re-tabulate it without copying:
+|   1. BALLOT_FILE_MAGIC
+|   2. Header length (uint32, little-endian)
+|   3. JSON header: candidate table (ID, name and party of each code),
+|      candidate IDs, choice count, dtype, row count, weighted
+|   4. Ballot rows (row count x choice count), aligned to FILE_ALIGNMENT
+|   5. Row weights (int64), aligned to FILE_ALIGNMENT, if weighted
+|
+| BallotFileWriter writes a file batch by batch, so ballots that don't fit in
+| memory can still be stored and mapped.  RankingTable keeps the unique
+| rankings of ballots that arrive in batches, in memory.
+"""
+
+# Import Libraries
+import json
+import os
+import shutil
+import struct
+import numpy as np
+from helpers import Candidate, MAX_CHOICES, NO_VOTE_VAL, NO_VOTE_PCT_THRESHOLD, PERCENTILE, BALLOT_CHUNK_SIZE
+
+
+BALLOT_FILE_MAGIC = b'RCVBALLOTS\x00\x01'
+FILE_ALIGNMENT = 64
+
+
+def aligned(offset):
+    """
+    Round a file offset up to the next FILE_ALIGNMENT boundary.
+
+    :param int offset: File offset in bytes.
+
+    :return: int: Aligned offset.
+    """
+
+    return -(-offset // FILE_ALIGNMENT) * FILE_ALIGNMENT
+
+
+def ballot_dtype(candidate_cnt):
+    """
+    Get the smallest unsigned integer type that can hold every candidate code plus the blank sentinel.
+
+    :param int candidate_cnt: Number of candidates on the ballot.
+
+    :return: numpy.dtype: uint8 or uint16.
+    """
+
+    if candidate_cnt < np.iinfo(np.uint8).max:
+        return np.dtype(np.uint8)
+
+    return np.dtype(np.uint16)
+
+
+def rank_count_matrix(ballots, candidate_cnt, no_vote, weights=None):
+    """
+    Count how many times each candidate was marked at each rank.
+    Each rank column is counted with a single np.bincount; blank choices fall into the sentinel bin and are dropped.
+
+    :param numpy.ndarray ballots: Ballot rows of candidate codes (voters x choices).
+    :param int candidate_cnt: Number of candidates.
+    :param int no_vote: Sentinel code for a blank choice.
+    :param numpy.ndarray weights: Number of voters per ballot row (optional).
+
+    :return: numpy.ndarray: Vote counts (candidates x choices).
+    """
+
+    choice_cnt = ballots.shape[1]
+    counts = np.zeros((candidate_cnt, choice_cnt), dtype=np.int64)
+
+    for choice in range(0, choice_cnt):
+        counts[:, choice] = np.bincount(ballots[:, choice], weights, minlength=no_vote + 1)[:candidate_cnt]
+
+    return counts
+
+
+def transfer_count_tensor(ballots, candidate_cnt, no_vote, weights=None):
+    """
+    Count how many ballots mark each pair of candidates at consecutive ranks: transfers[choice, a, b] is the number
+    of ballots with candidate a at `choice` and candidate b at `choice + 1`.  Each pair of rank columns is counted with
+    one np.bincount per block of rows; pairs with a blank choice are dropped.
+
+    :param numpy.ndarray ballots: Ballot rows of candidate codes (voters x choices).
+    :param int candidate_cnt: Number of candidates.
+    :param int no_vote: Sentinel code for a blank choice.
+    :param numpy.ndarray weights: Number of voters per ballot row (optional).
+
+    :return: numpy.ndarray: Transfer counts (choices - 1 x candidates x candidates).
+    """
+
+    choice_cnt = ballots.shape[1]
+    base = candidate_cnt + 1 # Blank choices map to code candidate_cnt
+    transfers = np.zeros((max(choice_cnt - 1, 0), candidate_cnt, candidate_cnt), dtype=np.int64)
+
+    for choice in range(0, choice_cnt - 1):
+        counts = np.zeros(base * base, dtype=np.int64)
+
+        for start in range(0, len(ballots), BALLOT_CHUNK_SIZE):
+            block = ballots[start:start + BALLOT_CHUNK_SIZE, choice:choice + 2]
+            pairs = np.minimum(block[:, 0], candidate_cnt).astype(np.int64) * base + np.minimum(block[:, 1], candidate_cnt)
+            block_weights = None if weights is None else weights[start:start + BALLOT_CHUNK_SIZE]
+
+            counts += np.bincount(pairs, block_weights, minlength=base * base).astype(np.int64)
+
+        transfers[choice] = counts.reshape(base, base)[:candidate_cnt, :candidate_cnt]
+
+    return transfers
+
+
+def pairwise_preference_matrix(ballots, candidate_cnt, no_vote, weights=None):
+    """
+    Count head-to-head preferences: pairwise[a, b] is the number of ballots that rank candidate a above candidate b.
+    A ranked candidate is preferred to every unranked one.  As in the runoff systems, choices after a ballot's first
+    blank are not counted.  Rows are counted block by block with one np.bincount per rank column and per pair of rank
+    columns, so memory is O(candidates^2) however many ballots there are.
+
+    :param numpy.ndarray ballots: Ballot rows of candidate codes (voters x choices).
+    :param int candidate_cnt: Number of candidates.
+    :param int no_vote: Sentinel code for a blank choice.
+    :param numpy.ndarray weights: Number of voters per ballot row (optional).
+
+    :return: numpy.ndarray: Pairwise counts (candidates x candidates), zero on the diagonal.
+    """
+
+    choice_cnt = ballots.shape[1]
+    base = candidate_cnt + 1 # Blank and uncounted choices map to code candidate_cnt
+    ranked = np.zeros(base, dtype=np.int64) # Ballots that rank each candidate
+    above = np.zeros(base * base, dtype=np.int64) # above[a * base + b]: ballots that rank both, a above b
+
+    for start in range(0, len(ballots), BALLOT_CHUNK_SIZE):
+        block = ballots[start:start + BALLOT_CHUNK_SIZE]
+        block_weights = None if weights is None else weights[start:start + BALLOT_CHUNK_SIZE]
+
+        live = np.logical_and.accumulate(block != no_vote, axis=1)
+        codes = np.where(live, np.minimum(block, candidate_cnt), candidate_cnt).astype(np.int64)
+
+        for choice in range(0, choice_cnt):
+            ranked += np.bincount(codes[:, choice], block_weights, minlength=base).astype(np.int64)
+
+            for later in range(choice + 1, choice_cnt):
+                pairs = codes[:, choice] * base + codes[:, later]
+                above += np.bincount(pairs, block_weights, minlength=base * base).astype(np.int64)
+
+    # a beats b on every ballot that ranks a, except those that rank b above a.
+    above = above.reshape(base, base)[:candidate_cnt, :candidate_cnt]
+    pairwise = ranked[:candidate_cnt, np.newaxis] - above.T
+    np.fill_diagonal(pairwise, 0)
+
+    return pairwise
+
+
+def ranking_keys(ballots, candidate_cnt, no_vote):
+    """
+    Pack each ballot row into one 64-bit integer (a base candidate_cnt + 1 number, blank = candidate_cnt) so rows
+    can be sorted and compared as scalars.  Rows too wide for 64 bits (deep ballots with many candidates) are keyed
+    by their raw bytes instead.
+
+    :param numpy.ndarray ballots: Ballot rows of candidate codes (voters x choices).
+    :param int candidate_cnt: Number of candidates.
+    :param int no_vote: Sentinel code for a blank choice.
+
+    :return: numpy.ndarray: One key per row.
+    """
+
+    base = candidate_cnt + 1
+
+    # The blank sentinel is fixed, so equal rankings have equal bytes.
+    if ballots.shape[1] * np.log2(base) >= 64:
+        ballots = np.ascontiguousarray(ballots)
+        return ballots.view(np.dtype((np.void, ballots.dtype.itemsize * ballots.shape[1]))).reshape(-1)
+
+    keys = np.zeros(len(ballots), dtype=np.uint64)
+
+    for choice in range(0, ballots.shape[1]):
+        codes = ballots[:, choice].astype(np.uint64)
+        codes[ballots[:, choice] == no_vote] = candidate_cnt
+        keys = keys * np.uint64(base) + codes
+
+    return keys
+
+
+def random_rankings(rng, voter_cnt, candidate_cnt, marked_cnt, dtype):
+    """
+    Draw the first `marked_cnt` places of a random permutation of the candidates for each voter.
+    With many candidates, draws are redone only for the rows that picked a candidate twice, which avoids shuffling
+    every candidate on every row.
+
+    :param numpy.random.Generator rng: Random number generator.
+    :param int voter_cnt: Number of rankings.
+    :param int candidate_cnt: Number of candidates.
+    :param int marked_cnt: Places to rank.
+    :param numpy.dtype dtype: Ballot code type.
+
+    :return: numpy.ndarray: Rankings (voters x marked_cnt).
+    """
+
+    if candidate_cnt < 4 * marked_cnt:
+        permutations = np.tile(np.arange(candidate_cnt, dtype=dtype), (voter_cnt, 1))
+        rng.permuted(permutations, axis=1, out=permutations)
+
+        return permutations[:, :marked_cnt]
+
+    rankings = rng.integers(0, candidate_cnt, (voter_cnt, marked_cnt), dtype=dtype)
+    repeats = np.arange(voter_cnt)
+
+    while len(repeats) > 0:
+        ordered = np.sort(rankings[repeats], axis=1)
+        repeats = repeats[(ordered[:, 1:] == ordered[:, :-1]).any(axis=1)]
+        rankings[repeats] = rng.integers(0, candidate_cnt, (len(repeats), marked_cnt), dtype=dtype)
+
+    return rankings
+
+
+def generate_ballot_matrix(rng, voter_cnt, candidate_cnt, choice_cnt=MAX_CHOICES, no_vote_pct=NO_VOTE_PCT_THRESHOLD):
+    """
+    Generate random ballots in bulk.  Each voter ranks a random permutation of the candidates, truncated to the
+    ballot, and leaves a choice blank with no_vote_pct in PERCENTILE odds.  A blank choice does not use up a
+    candidate, the same as a voter marking choices one at a time.
+
+    :param numpy.random.Generator rng: Random number generator.
+    :param int voter_cnt: Number of ballots to generate.
+    :param int candidate_cnt: Number of candidates.
+    :param int choice_cnt: Number of ranked choices on each ballot.
+    :param int no_vote_pct: Odds (in PERCENTILE) of leaving a choice blank.
+
+    :return: numpy.ndarray: Ballot rows of candidate codes (voters x choices).
+    """
+
+    dtype = ballot_dtype(candidate_cnt)
+    no_vote = np.iinfo(dtype).max
+    marked_cnt = min(choice_cnt, candidate_cnt)
+
+    ballots = np.full((voter_cnt, choice_cnt), no_vote, dtype=dtype)
+
+    # Generate in blocks so the permutations never need the whole electorate in memory.
+    for start in range(0, voter_cnt, BALLOT_CHUNK_SIZE):
+        block = ballots[start:start + BALLOT_CHUNK_SIZE]
+        block_cnt = len(block)
+
+        permutations = random_rankings(rng, block_cnt, candidate_cnt, marked_cnt, dtype)
+
+        blanks = rng.integers(0, PERCENTILE + 1, (block_cnt, marked_cnt)) < no_vote_pct
+        picks = np.maximum(np.cumsum(~blanks, axis=1) - 1, 0)
+        choices = np.take_along_axis(permutations, picks, axis=1)
+
+        block[:, :marked_cnt] = np.where(blanks, no_vote, choices)
+
+    return ballots
+
+
+def candidate_rows(candidates):
+    """
+    Get the ID, name and party of each candidate for a ballot file header.  A bare ID is its own name, with no party.
+
+    :param list candidates: Candidates, or candidate IDs.
+
+    :return: list: [ID, name, party] per candidate.
+    """
+
+    return [
+        [candidate.id, candidate.name, candidate.party] if isinstance(candidate, Candidate) else [candidate, candidate, '']
+        for candidate in candidates
+    ]
+
+
+def write_header(file, candidate_table, choice_cnt, dtype, row_cnt, weighted):
+    """
+    Write the magic, header and padding of a ballot file, up to where the ballot rows start.
+
+    :param file file: Ballot file open for binary writing, at its start.
+    :param list candidate_table: [ID, name, party] of each candidate in code order (see candidate_rows).
+    :param int choice_cnt: Number of ranked choices on each ballot.
+    :param numpy.dtype dtype: Type of the ballot codes.
+    :param int row_cnt: Number of ballot rows.
+    :param bool weighted: Whether row weights follow the rows.
+
+    :return: None
+    """
+
+    header = json.dumps({
+        'candidates': candidate_table,
+        'candidate_ids': [row[0] for row in candidate_table],
+        'choice_cnt': choice_cnt,
+        'dtype': np.dtype(dtype).str,
+        'row_cnt': row_cnt,
+        'weighted': weighted
+    }).encode('utf-8')
+
+    file.write(BALLOT_FILE_MAGIC)
+    file.write(struct.pack('<I', len(header)))
+    file.write(header)
+    file.write(b'\x00' * (aligned(file.tell()) - file.tell()))
+
+
+class BallotStore:
+    """
+    Ballots held as a matrix of candidate codes.
+
+    Attributes:
+        candidate_ids (list): Candidate IDs in code order (code = index).
+        codes (dict): Candidate ID to code lookup.
+        choice_cnt (int): Number of ranked choices on each ballot.
+        no_vote (int): Sentinel code for a blank choice.
+        matrix (numpy.ndarray): Ballot rows (voters x choice_cnt).
+        row_cnt (int): Number of ballot rows filled so far.
+        weights (numpy.ndarray): Voters per row once compressed, None while every row is one voter.
+        source (tuple): Ballot file path and first file row the rows are mapped from, None if not mapped.
+        candidate_table (list): [ID, name, party] of each code, from a ballot file; None if only the IDs are known.
+    """
+
+    def __init__(self, candidate_ids, capacity=0, choice_cnt=MAX_CHOICES):
+        self.candidate_ids = list(candidate_ids)
+        self.codes = {u_id: code for code, u_id in enumerate(self.candidate_ids)}
+        self.choice_cnt = choice_cnt
+
+        dtype = ballot_dtype(len(self.candidate_ids))
+        self.no_vote = np.iinfo(dtype).max
+        self.matrix = np.full((capacity, choice_cnt), self.no_vote, dtype=dtype)
+        self.row_cnt = 0
+        self.weights = None
+        self.source = None
+        self.candidate_table = None
+
+    @classmethod
+    def from_lists(cls, ballots, candidate_ids, choice_cnt=MAX_CHOICES):
+        """
+        Build a store from list-of-lists ballots of candidate IDs.
+
+        :param list ballots: Ballots as lists of candidate IDs.
+        :param list candidate_ids: Candidate IDs in registration order.
+        :param int choice_cnt: Number of ranked choices on each ballot.
+
+        :return: BallotStore: The populated store.
+        """
+
+        store = cls(candidate_ids, len(ballots), choice_cnt)
+
+        for ballot in ballots:
+            store.append(ballot)
+
+        return store
+
+    @classmethod
+    def generate(cls, candidate_ids, voter_cnt, rng, choice_cnt=MAX_CHOICES, no_vote_pct=NO_VOTE_PCT_THRESHOLD):
+        """
+        Build a store of random ballots.
+
+        :param list candidate_ids: Candidate IDs in registration order.
+        :param int voter_cnt: Number of ballots to generate.
+        :param numpy.random.Generator rng: Random number generator.
+        :param int choice_cnt: Number of ranked choices on each ballot.
+        :param int no_vote_pct: Odds (in PERCENTILE) of leaving a choice blank.
+
+        :return: BallotStore: The populated store.
+        """
+
+        store = cls(candidate_ids, 0, choice_cnt)
+        store.matrix = generate_ballot_matrix(rng, voter_cnt, len(store.candidate_ids), choice_cnt, no_vote_pct)
+        store.row_cnt = voter_cnt
+
+        return store
+
+    def __reduce_ex__(self, protocol):
+        # A store mapped from a ballot file is reopened from its rows of the file in other processes instead of
+        # copying its ballots.  Anything else (e.g. a mapped store whose matrix was replaced) is pickled as usual.
+        if self.source is not None and isinstance(self.matrix, np.memmap):
+            path, start = self.source
+            return BallotStore.open_rows, (path, start, start + self.row_cnt)
+
+        return super().__reduce_ex__(protocol)
+
+    def __len__(self):
+        return self.ballot_cnt()
+
+    def __getitem__(self, index):
+        return self.decode(self.rows()[index])
+
+    def __iter__(self):
+        for row in self.rows():
+            yield self.decode(row)
+
+    def rows(self):
+        """
+        Get the matrix rows that hold cast ballots.
+
+        :return: numpy.ndarray: View of the filled rows.
+        """
+
+        return self.matrix[:self.row_cnt]
+
+    def ballot_cnt(self):
+        """
+        Get the number of voters that cast a ballot.
+
+        :return: int: Number of ballots.
+        """
+
+        if self.weights is None:
+            return self.row_cnt
+
+        return int(self.weights.sum())
+
+    def weight_of(self, rows):
+        """
+        Get the number of voters behind some ballot rows.
+
+        :param numpy.ndarray rows: Ballot row numbers.
+
+        :return: int: Number of voters.
+        """
+
+        if self.weights is None:
+            return len(rows)
+
+        return int(self.weights[rows].sum())
+
+    def encode(self, ballot):
+        """
+        Convert a ballot of candidate IDs to a row of codes.
+
+        :param list ballot: Candidate IDs in ranked order, NO_VOTE_VAL for a blank choice.
+
+        :return: numpy.ndarray: Row of codes padded with the blank sentinel.
+        """
+
+        row = np.full(self.choice_cnt, self.no_vote, dtype=self.matrix.dtype)
+
+        for choice, voted_id in enumerate(ballot[:self.choice_cnt]):
+            if voted_id != NO_VOTE_VAL:
+                row[choice] = self.codes[voted_id]
+
+        return row
+
+    def decode(self, row):
+        """
+        Convert a row of codes back to candidate IDs.
+
+        :param numpy.ndarray row: Row of codes.
+
+        :return: list: Candidate IDs in ranked order, NO_VOTE_VAL for a blank choice.
+        """
+
+        return [NO_VOTE_VAL if code == self.no_vote else self.candidate_ids[code] for code in row]
+
+    def append(self, ballot, weight=1):
+        """
+        Cast a ballot.  The matrix grows geometrically if it is full.
+
+        :param list ballot: Candidate IDs in ranked order.
+        :param int weight: Number of voters that cast this ranking.
+
+        :return: None
+        """
+
+        if self.row_cnt == len(self.matrix):
+            self.reserve(max(1, 2 * self.row_cnt))
+
+        if self.weights is None and weight != 1:
+            self.weights = np.ones(self.row_cnt, dtype=np.int64)
+
+        if self.weights is not None:
+            self.weights = np.append(self.weights, weight)
+
+        self.matrix[self.row_cnt] = self.encode(ballot)
+        self.row_cnt += 1
+
+    def reserve(self, capacity):
+        """
+        Make room for at least `capacity` ballots.
+
+        :param int capacity: Number of rows needed.
+
+        :return: None
+        """
+
+        if capacity <= len(self.matrix):
+            return
+
+        matrix = np.full((capacity, self.choice_cnt), self.no_vote, dtype=self.matrix.dtype)
+        matrix[:self.row_cnt] = self.rows()
+        self.matrix = matrix
+
+    def rank_counts(self):
+        """
+        Count the votes each candidate received at each rank.
+
+        :return: numpy.ndarray: Vote counts (candidates x choices) in code order.
+        """
+
+        return rank_count_matrix(self.rows(), len(self.candidate_ids), self.no_vote, self.weights)
+
+    def transfer_counts(self):
+        """
+        Count the ballots that mark one candidate at a rank and another at the next rank.
+
+        :return: numpy.ndarray: Transfer counts (choices - 1 x candidates x candidates) in code order.
+        """
+
+        return transfer_count_tensor(self.rows(), len(self.candidate_ids), self.no_vote, self.weights)
+
+    def pairwise_counts(self):
+        """
+        Count how many ballots rank each candidate above each other candidate.
+
+        :return: numpy.ndarray: Pairwise counts (candidates x candidates) in code order.
+        """
+
+        return pairwise_preference_matrix(self.rows(), len(self.candidate_ids), self.no_vote, self.weights)
+
+    def slice(self, start, stop):
+        """
+        Get a store of a range of rows, e.g. to send one chunk to a worker.
+
+        :param int start: First row.
+        :param int stop: Row after the last.
+
+        :return: BallotStore: Store of the rows (a view where possible).
+        """
+
+        store = BallotStore(self.candidate_ids, 0, self.choice_cnt)
+        store.candidate_table = self.candidate_table
+        store.matrix = self.rows()[start:stop]
+        store.row_cnt = len(store.matrix)
+        store.weights = None if self.weights is None else self.weights[start:stop]
+
+        if self.source is not None:
+            path, first = self.source
+            store.source = (path, first + range(self.row_cnt)[start:stop].start)
+
+        return store
+
+    def blank_counts(self):
+        """
+        Count the blank choices at each rank.
+
+        :return: numpy.ndarray: Blank counts per choice.
+        """
+
+        blanks = self.rows() == self.no_vote
+
+        if self.weights is None:
+            return np.count_nonzero(blanks, axis=0)
+
+        return self.weights @ blanks
+
+    def compress(self):
+        """
+        Collapse identical rankings into one row with a count of the voters that cast it.
+
+        :return: BallotStore: A store of unique rankings and their weights.
+        """
+
+        keys = ranking_keys(self.rows(), len(self.candidate_ids), self.no_vote)
+
+        _, first_rows, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        rankings = self.rows()[first_rows]
+
+        inverse = inverse.reshape(-1)
+
+        if self.weights is None:
+            weights = np.bincount(inverse, minlength=len(rankings))
+        else:
+            weights = np.bincount(inverse, self.weights, minlength=len(rankings)).astype(np.int64)
+
+        store = BallotStore(self.candidate_ids, 0, self.choice_cnt)
+        store.candidate_table = self.candidate_table
+        store.matrix = rankings
+        store.row_cnt = len(rankings)
+        store.weights = weights.astype(np.int64)
+
+        return store
+
+    @classmethod
+    def merge(cls, stores):
+        """
+        Merge stores that share a candidate table into one store of unique rankings.
+
+        :param list stores: Ballot stores to merge.
+
+        :return: BallotStore: Compressed store holding every ballot.
+        """
+
+        merged = cls(stores[0].candidate_ids, 0, stores[0].choice_cnt)
+        merged.candidate_table = stores[0].candidate_table
+        merged.matrix = np.concatenate([store.rows() for store in stores])
+        merged.row_cnt = len(merged.matrix)
+        merged.weights = np.concatenate([
+            np.ones(store.row_cnt, dtype=np.int64) if store.weights is None else store.weights for store in stores
+        ])
+
+        return merged.compress()
+
+    def save(self, path, candidates=None):
+        """
+        Write the store to a binary ballot file.
+
+        :param string path: Path to the ballot file.
+        :param list candidates: Candidates in code order, for their names and parties (default: the store's
+            candidate table, or the bare IDs).
+
+        :return: None
+
+        :raises: ValueError: If the candidates are not the store's, in code order.
+        """
+
+        candidate_table = self.table_of(candidates)
+
+        with open(path, 'wb') as file:
+            write_header(file, candidate_table, self.choice_cnt, self.matrix.dtype, self.row_cnt,
+                         self.weights is not None)
+
+            np.ascontiguousarray(self.rows()).tofile(file)
+
+            if self.weights is not None:
+                file.write(b'\x00' * (aligned(file.tell()) - file.tell()))
+                self.weights.astype('<i8').tofile(file)
+
+    def table_of(self, candidates=None):
+        """
+        Get the candidate table to write to a ballot file.
+
+        :param list candidates: Candidates, or candidate IDs, in code order (default: the store's candidate table).
+
+        :return: list: [ID, name, party] of each code.
+
+        :raises: ValueError: If the candidates are not the store's, in code order.
+        """
+
+        if candidates is None:
+            return self.candidate_table if self.candidate_table is not None else candidate_rows(self.candidate_ids)
+
+        candidate_table = candidate_rows(candidates)
+
+        if [row[0] for row in candidate_table] != self.candidate_ids:
+            raise ValueError('Candidates do not match the ballot store\'s candidate codes.')
+
+        return candidate_table
+
+    def make_candidates(self):
+        """
+        Make candidates from the store's candidate table, e.g. to register the candidates of an opened ballot file.
+
+        :return: list: New candidates in code order (bare IDs if the table isn't known).
+        """
+
+        return [Candidate(u_id, name, party) for u_id, name, party in self.table_of()]
+
+    @classmethod
+    def open(cls, path):
+        """
+        Open a binary ballot file read-only.  The ballot rows (and weights) are memory-mapped, not read.
+
+        :param string path: Path to the ballot file.
+
+        :return: BallotStore: A read-only store backed by the file.
+
+        :raises: ValueError: If the file is not a ballot file.
+        """
+
+        with open(path, 'rb') as file:
+            if file.read(len(BALLOT_FILE_MAGIC)) != BALLOT_FILE_MAGIC:
+                raise ValueError(f'Not a ballot file: {path}')
+
+            header_len = struct.unpack('<I', file.read(4))[0]
+            header = json.loads(file.read(header_len).decode('utf-8'))
+            offset = aligned(file.tell())
+
+        store = cls(header['candidate_ids'], 0, header['choice_cnt'])
+        dtype = np.dtype(header['dtype'])
+        shape = (header['row_cnt'], header['choice_cnt'])
+
+        if header['row_cnt'] > 0:
+            store.matrix = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+            offset = aligned(offset + store.matrix.nbytes)
+
+            if header['weighted']:
+                store.weights = np.memmap(path, dtype='<i8', mode='r', offset=offset, shape=(header['row_cnt'],))
+
+        elif header['weighted']:
+            store.weights = np.zeros(0, dtype=np.int64)
+
+        store.row_cnt = header['row_cnt']
+        store.source = (path, 0)
+        store.candidate_table = header.get('candidates')
+
+        return store
+
+    @classmethod
+    def open_rows(cls, path, start, stop):
+        """
+        Open a range of rows of a binary ballot file read-only, e.g. one chunk in a worker process.
+
+        :param string path: Path to the ballot file.
+        :param int start: First row.
+        :param int stop: Row after the last.
+
+        :return: BallotStore: A read-only store of the rows, backed by the file.
+        """
+
+        return cls.open(path).slice(start, stop)
+
+    def read_only(self):
+        """
+        Get a view of the store that shares its ballots but cannot change them.
+
+        :return: BallotStore: A read-only view.
+        """
+
+        store = BallotStore(self.candidate_ids, 0, self.choice_cnt)
+        store.candidate_table = self.candidate_table
+        store.matrix = self.rows().view()
+        store.matrix.flags.writeable = False
+        store.row_cnt = self.row_cnt
+        store.weights = self.weights
+        store.source = self.source
+
+        return store
+
+    def copy(self):
+        """
+        Copy the store, including the ballot matrix.
+
+        :return: BallotStore: An independent copy.
+        """
+
+        store = BallotStore(self.candidate_ids, 0, self.choice_cnt)
+        store.candidate_table = self.candidate_table
+        store.matrix = self.rows().copy()
+        store.row_cnt = self.row_cnt
+
+        if self.weights is not None:
+            store.weights = self.weights.copy()
+
+        return store
+
+    def nbytes(self):
+        """
+        Memory held by the cast ballots.
+
+        :return: int: Size in bytes.
+        """
+
+        return self.rows().nbytes
+
+
+class BallotFileWriter:
+    """
+    Write a weighted ballot file batch by batch, so a file larger than memory can be written.  The header needs the
+    row count, so rows and weights are spooled to temporary files beside the ballot file and joined on close().
+
+    Attributes:
+        path (string): Path to the ballot file.
+        candidate_table (list): [ID, name, party] of each code.
+        candidate_ids (list): Candidate IDs in code order.
+        choice_cnt (int): Number of ranked choices on each ballot.
+        dtype (numpy.dtype): Type of the ballot codes.
+        row_cnt (int): Number of rows written so far.
+    """
+
+    def __init__(self, path, candidates, choice_cnt=MAX_CHOICES):
+        self.path = path
+        self.candidate_table = candidate_rows(candidates)
+        self.candidate_ids = [row[0] for row in self.candidate_table]
+        self.choice_cnt = choice_cnt
+        self.dtype = ballot_dtype(len(self.candidate_ids))
+        self.row_cnt = 0
+
+        self.rows_file = open(f'{path}.rows', 'wb')
+        self.weights_file = open(f'{path}.weights', 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # On an error, just clean up the spool files.
+        if exc_type is not None:
+            self.discard()
+
+    def append(self, store):
+        """
+        Write a store's rows (and weights) to the end of the file.
+
+        :param BallotStore store: Ballots with the writer's candidate table and depth.
+
+        :return: None
+
+        :raises: ValueError: If the store's candidate table or ballot depth does not match the writer's.
+        """
+
+        if store.candidate_ids != self.candidate_ids or store.choice_cnt != self.choice_cnt:
+            raise ValueError(f'Ballot store candidates or depth do not match the ballot file: {self.path}')
+
+        np.ascontiguousarray(store.rows(), dtype=self.dtype).tofile(self.rows_file)
+
+        weights = np.ones(store.row_cnt, dtype='<i8') if store.weights is None else store.weights.astype('<i8')
+        weights.tofile(self.weights_file)
+
+        self.row_cnt += store.row_cnt
+
+    def close(self):
+        """
+        Join the spooled rows and weights into the ballot file and open it.
+
+        :return: BallotStore: A read-only store backed by the file.
+        """
+
+        self.rows_file.close()
+        self.weights_file.close()
+
+        with open(self.path, 'wb') as file:
+            write_header(file, self.candidate_table, self.choice_cnt, self.dtype, self.row_cnt, True)
+
+            with open(self.rows_file.name, 'rb') as rows_file:
+                shutil.copyfileobj(rows_file, file)
+
+            file.write(b'\x00' * (aligned(file.tell()) - file.tell()))
+
+            with open(self.weights_file.name, 'rb') as weights_file:
+                shutil.copyfileobj(weights_file, file)
+
+        self.discard()
+
+        return BallotStore.open(self.path)
+
+    def discard(self):
+        """
+        Remove the spool files.
+
+        :return: None
+        """
+
+        for spool in (self.rows_file, self.weights_file):
+            spool.close()
+
+            if os.path.exists(spool.name):
+                os.remove(spool.name)
+
+
+class RankingTable:
+    """
+    Unique rankings and their weights, grown batch by batch.  Rankings already in the table get the batch's weight,
+    and new rankings are appended, so rows never move.
+
+    Keys are kept in sorted runs, each at most half the size of the one before, like a binary counter: a batch is
+    looked up in every run, and its new keys become a run that is merged into the runs no larger than it.  A key is
+    merged O(log rankings) times, so adding a batch costs about the batch, not the table.
+
+    Attributes:
+        store (BallotStore): The unique rankings, in the order they were first seen; store.weights views weights.
+        weights (numpy.ndarray): Weight of each row, with room to grow.
+        runs (list): Sorted runs, largest first, as (ranking keys, row of each key) tuples.
+    """
+
+    def __init__(self, candidate_ids, choice_cnt=MAX_CHOICES):
+        self.store = BallotStore(candidate_ids, 0, choice_cnt)
+        self.weights = np.zeros(0, dtype=np.int64)
+        self.store.weights = self.weights
+        self.runs = []
+
+    def find(self, keys):
+        """
+        Look up ranking keys.
+
+        :param numpy.ndarray keys: Ranking keys.
+
+        :return: numpy.ndarray: Row of each key, or -1 if the ranking isn't in the table.
+        """
+
+        rows = np.full(len(keys), -1, dtype=np.int64)
+
+        for run_keys, run_rows in self.runs:
+            spots = np.minimum(np.searchsorted(run_keys, keys), len(run_keys) - 1)
+            found = run_keys[spots] == keys
+            rows[found] = run_rows[spots[found]]
+
+        return rows
+
+    def add(self, unique):
+        """
+        Add a batch of ballots to the table.
+
+        :param BallotStore unique: The batch, compressed, with the table's candidate table and depth.
+
+        :return: numpy.ndarray: Rows appended for rankings not seen before.
+        """
+
+        keys = ranking_keys(unique.rows(), len(self.store.candidate_ids), self.store.no_vote)
+        found = self.find(keys)
+
+        known = found >= 0
+        self.weights[found[known]] += unique.weights[known]
+
+        new = ~known
+        start = self.store.row_cnt
+        stop = start + np.count_nonzero(new)
+        rows = np.arange(start, stop)
+
+        # Grow by doubling, so appending stays cheap over many batches.
+        if stop > len(self.weights):
+            capacity = max(stop, 2 * len(self.weights))
+            self.store.reserve(capacity)
+            self.weights = np.concatenate((self.weights, np.zeros(capacity - len(self.weights), dtype=np.int64)))
+
+        self.store.matrix[start:stop] = unique.rows()[new]
+        self.store.row_cnt = stop
+        self.weights[start:stop] = unique.weights[new]
+        self.store.weights = self.weights[:stop]
+
+        # Batch keys come sorted from compress(), so the new keys are a sorted run.
+        run_keys, run_rows = keys[new], rows
+
+        while len(self.runs) > 0 and len(self.runs[-1][0]) <= 2 * len(run_keys):
+            last_keys, last_rows = self.runs.pop()
+            run_keys = np.concatenate((last_keys, run_keys))
+            run_rows = np.concatenate((last_rows, run_rows))
+
+            order = np.argsort(run_keys, kind='stable')
+            run_keys, run_rows = run_keys[order], run_rows[order]
+
+        if len(run_keys) > 0:
+            self.runs.append((run_keys, run_rows))
+
+        return rows
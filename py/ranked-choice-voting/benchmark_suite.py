@@ -0,0 +1,274 @@
+"""
+|--------------------------------------------------------------------------
+| Benchmark Suite
+|--------------------------------------------------------------------------
+| Non-interactive benchmarks for the ranked choice voting pipeline over a
+| grid of electorate sizes, candidate counts and abstention rates.  Every
+| case uses a fixed seed, so runs are comparable.
+|
+| Benchmarked:
+| - Election.tally
+| - score_ballots of each voting system
+| - VotingSystem.break_tie
+| - AllVotingWeightedSystem.score_ballots
+|
+| Each case reports its best time over a few repeats, its throughput in
+| ballots per second and its peak traced memory.  Results can be saved as a
+| baseline and later runs compared against it.
+|
+| Usage:
+|   python benchmark_suite.py --max-voters 1000000 --save baseline.json
+|   python benchmark_suite.py --max-voters 1000000 --baseline baseline.json
+"""
+
+# Import Libraries
+import argparse
+import contextlib
+import copy
+import itertools
+import json
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+from all_voting_sys_weighted import AllVotingWeightedSystem
+from ballot_store import BallotStore
+from election import Election
+from helpers import Candidate, MIN_CANDIDATES, MEDIAN_CANDIDATES, MAX_CANDIDATES, NO_VOTE_PCT_THRESHOLD, \
+    FIRST_CHOICE_INDEX
+from tabulation_runner import VOTING_SYSTEMS, run_system
+from voting_sys import VotingSystem
+
+VOTER_CNTS = [1000, 10000, 100000, 1000000, 10000000, 100000000]
+CANDIDATE_CNTS = [MIN_CANDIDATES, MEDIAN_CANDIDATES, MAX_CANDIDATES]
+NO_VOTE_PCTS = [0, NO_VOTE_PCT_THRESHOLD]
+
+SEED = 2025
+REPEATS = 3
+REGRESSION_PCT = 10 # Slower than the baseline by more than this is a regression
+
+
+def make_election(candidate_cnt, voter_cnt, no_vote_pct):
+    """
+    Build a tallied election with seeded random ballots.
+
+    :param int candidate_cnt: Number of candidates.
+    :param int voter_cnt: Number of voters.
+    :param int no_vote_pct: Odds (in PERCENTILE) of leaving a choice blank.
+
+    :return: Election: The tallied election.
+    """
+
+    elect = Election()
+    elect.register_candidates([Candidate(f'c{i}', f'Candidate {i}', 'No-Party Affiliation') for i in range(candidate_cnt)])
+    elect.ballots = BallotStore.generate(
+        elect.registry.ids(), voter_cnt, np.random.default_rng(SEED), no_vote_pct=no_vote_pct
+    )
+    elect.tally()
+
+    return elect
+
+
+def tally_case(elect):
+    """
+    Benchmark case: count the rank matrix and fill each candidate's votes.
+    """
+
+    def run():
+        elect.rank_counts = None
+        elect.tally()
+
+    return run
+
+
+def system_case(elect, system_cls):
+    """
+    Benchmark case: score the ballots of one voting system.  Building the system is not timed.
+    """
+
+    def setup():
+        registry = elect.registry.fork()
+        return system_cls(list(registry.candidates), elect.ballots, registry)
+
+    def run(system):
+        system.score_ballots()
+
+    return setup, run
+
+
+def break_tie_case(elect):
+    """
+    Benchmark case: break a tie between every candidate.
+    """
+
+    def run():
+        system = VotingSystem(elect.candidates, elect.ballots, elect.registry)
+        system.break_tie(list(elect.candidates), 'max', FIRST_CHOICE_INDEX)
+
+    return run
+
+
+def all_weighted_case(elect):
+    """
+    Benchmark case: weigh every voting system's totals into an overall total.  The systems are run once, and copying
+    their results and building the system are not timed.
+    """
+
+    results = [run_system(system_cls, elect.registry, elect.ballots) for system_cls in VOTING_SYSTEMS]
+
+    def setup():
+        return AllVotingWeightedSystem(copy.deepcopy(results))
+
+    def run(system):
+        system.score_ballots()
+
+    return setup, run
+
+
+def measure(run, setup=None, repeats=REPEATS):
+    """
+    Time a case and trace its peak memory.  The memory run is separate so tracing doesn't skew the timings.
+
+    :param callable run: The benchmarked code; takes the setup value if there is a setup.
+    :param callable setup: Untimed preparation before each repeat (optional).
+    :param int repeats: Number of timed repeats.
+
+    :return: dict: Best seconds and peak traced bytes.
+    """
+
+    def call():
+        args = () if setup is None else (setup(),)
+
+        start = time.perf_counter()
+        run(*args)
+        return time.perf_counter() - start
+
+    best = min(call() for _ in range(repeats))
+
+    tracemalloc.start()
+    call()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'seconds': best, 'peak_bytes': peak_bytes}
+
+
+def run_suite(voter_cnts=VOTER_CNTS, candidate_cnts=CANDIDATE_CNTS, no_vote_pcts=NO_VOTE_PCTS, repeats=REPEATS):
+    """
+    Run every benchmark case over the grid.
+
+    :param list voter_cnts: Numbers of voters.
+    :param list candidate_cnts: Numbers of candidates.
+    :param list no_vote_pcts: Abstention odds (in PERCENTILE).
+    :param int repeats: Timed repeats per case.
+
+    :return: list: One result per case.
+    """
+
+    results = []
+
+    for voter_cnt, candidate_cnt, no_vote_pct in itertools.product(voter_cnts, candidate_cnts, no_vote_pcts):
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            elect = make_election(candidate_cnt, voter_cnt, no_vote_pct)
+
+            cases = {'Election.tally': (tally_case(elect), None)}
+            for system_cls in VOTING_SYSTEMS:
+                setup, run = system_case(elect, system_cls)
+                cases[f'{system_cls.__name__}.score_ballots'] = (run, setup)
+
+            cases['VotingSystem.break_tie'] = (break_tie_case(elect), None)
+            setup, run = all_weighted_case(elect)
+            cases['AllVotingWeightedSystem.score_ballots'] = (run, setup)
+
+            measurements = {name: measure(run, setup, repeats) for name, (run, setup) in cases.items()}
+
+        for name, measurement in measurements.items():
+            result = {
+                'case': name,
+                'voter_cnt': voter_cnt,
+                'candidate_cnt': candidate_cnt,
+                'no_vote_pct': no_vote_pct,
+                'seconds': measurement['seconds'],
+                'ballots_per_sec': voter_cnt / measurement['seconds'] if measurement['seconds'] > 0 else None,
+                'peak_bytes': measurement['peak_bytes']
+            }
+
+            results.append(result)
+            print(f'{name} voters={voter_cnt} candidates={candidate_cnt} no_vote={no_vote_pct}: '
+                  f'{result["seconds"]:.6f}s {result["peak_bytes"] / 1e6:.1f} MB')
+
+    return results
+
+
+def case_key(result):
+    """
+    Key that identifies the same case across runs.
+
+    :param dict result: Benchmark result.
+
+    :return: tuple: Case name and grid point.
+    """
+
+    return result['case'], result['voter_cnt'], result['candidate_cnt'], result['no_vote_pct']
+
+
+def compare(results, baseline, regression_pct=REGRESSION_PCT):
+    """
+    Compare results against a saved baseline.
+
+    :param list results: Results of this run.
+    :param list baseline: Results of the baseline run.
+    :param int regression_pct: Allowed slowdown in percent.
+
+    :return: list: Results that are slower than the baseline by more than regression_pct.
+    """
+
+    baseline = {case_key(result): result for result in baseline}
+    regressions = []
+
+    print('\n--- Compared to baseline ---')
+    for result in results:
+        base = baseline.get(case_key(result))
+        if base is None:
+            continue
+
+        change_pct = (result['seconds'] / base['seconds'] - 1) * 100 if base['seconds'] > 0 else 0
+        print(f'{result["case"]} voters={result["voter_cnt"]} candidates={result["candidate_cnt"]} '
+              f'no_vote={result["no_vote_pct"]}: {change_pct:+.1f}%')
+
+        if change_pct > regression_pct:
+            regressions.append(result)
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the ranked choice voting systems.')
+    parser.add_argument('--max-voters', type=int, default=100000, help='Largest electorate in the grid.')
+    parser.add_argument('--repeats', type=int, default=REPEATS, help='Timed repeats per case.')
+    parser.add_argument('--save', help='Save the results as a baseline to this JSON file.')
+    parser.add_argument('--baseline', help='Compare against a baseline JSON file.')
+    parser.add_argument('--regression-pct', type=float, default=REGRESSION_PCT, help='Allowed slowdown in percent.')
+    args = parser.parse_args(argv)
+
+    voter_cnts = [voter_cnt for voter_cnt in VOTER_CNTS if voter_cnt <= args.max_voters]
+    results = run_suite(voter_cnts, repeats=args.repeats)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.regression_pct)
+
+        if len(regressions) > 0:
+            print(f'\n{len(regressions)} cases regressed by more than {args.regression_pct}%.')
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
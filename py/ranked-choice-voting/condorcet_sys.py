@@ -0,0 +1,122 @@
+"""
+|--------------------------------------------------------------------------
+| Condorcet System
+|--------------------------------------------------------------------------
+| Compare every pair of candidates head-to-head: for each pair, count the
+| voters who rank one above the other.  A candidate who beats every other
+| candidate head-to-head is the Condorcet winner.  If there isn't one (the
+| head-to-head results go in a cycle), the Schulze method picks the winner.
+|
+| Each candidate's total is their Copeland score: head-to-head wins minus
+| losses.  The result also lists the Copeland and Schulze rankings, which is
+| useful for auditing the outcome of the runoff systems.
+|
+| @link https://en.wikipedia.org/wiki/Condorcet_method
+| @link https://en.wikipedia.org/wiki/Schulze_method
+"""
+
+# Import Libraries
+import numpy as np
+from events import log, emit
+from helpers import FIRST_CHOICE_INDEX
+from pairwise import pairwise_counts, condorcet_winner, copeland_scores, schulze_ranking
+from voting_sys import VotingSystem
+
+
+class CondorcetSystem(VotingSystem):
+    """
+    Head-to-head tabulation from the pairwise preference matrix.
+
+    Attributes:
+        workers (int): Worker processes for counting the pairwise matrix (None = this process).
+        pairwise (numpy.ndarray): Voters preferring each candidate over each other candidate (candidates x candidates);
+            counted on first use unless set beforehand.
+        condorcet_winner_id (string): ID of the Condorcet winner, or None if there isn't one.
+        copeland_ranking (list): Candidate IDs by Copeland score.
+        schulze_ranking (list): Candidate IDs by the Schulze method.
+        schulze_winner_id (string): ID of the Schulze winner, or None if the top of the ranking is tied.
+    """
+
+    def __init__(self, candidates, ballots, registry=None, workers=None):
+        super().__init__(candidates, ballots, registry)
+        self.title = 'Condorcet'
+        self.workers = workers
+        self.pairwise = None
+        self.condorcet_winner_id = None
+        self.copeland_ranking = []
+        self.schulze_ranking = []
+        self.schulze_winner_id = None
+        self.show_banner()
+
+    def score_ballots(self):
+        """
+        Count the pairwise matrix (unless it was given) and score each candidate by Copeland score.
+
+        :return: None
+        """
+
+        if self.pairwise is None:
+            self.pairwise = pairwise_counts(self.ballots, self.workers)
+
+        # Registry indexes are ballot codes, so scores line up with the rows of the candidate table.
+        scores = copeland_scores(self.pairwise)
+        self.registry.table.totals[:] = scores
+
+        winner = condorcet_winner(self.pairwise)
+        self.condorcet_winner_id = self.registry.get(winner).id if winner is not None else None
+
+        self.copeland_ranking = [self.registry.get(index).id for index in np.argsort(-scores, kind='stable')]
+
+        order, beaten_cnts = schulze_ranking(self.pairwise)
+        self.schulze_ranking = [self.registry.get(index).id for index in order]
+
+        # Only a candidate who beats strictly more candidates than anyone else is the Schulze winner.
+        if len(order) > 0 and np.count_nonzero(beaten_cnts == beaten_cnts[order[FIRST_CHOICE_INDEX]]) == 1:
+            self.schulze_winner_id = self.schulze_ranking[FIRST_CHOICE_INDEX]
+        else:
+            self.schulze_winner_id = None
+
+        for candidate in self.candidates:
+            log.info('Candidate: %s Copeland: %s', candidate.id, candidate.total)
+
+    def tabulate(self):
+        """
+        Score the ballots and determine the winner: the Condorcet winner, or else the Schulze winner.
+
+        :return: list: Candidates in Schulze order.
+        """
+
+        self.score_ballots()
+
+        winner_id = self.condorcet_winner_id if self.condorcet_winner_id is not None else self.schulze_winner_id
+
+        if winner_id is not None:
+            winner = self.registry.find(winner_id)
+            winner.is_winner = True
+            self.winner_id = winner_id
+            emit('winner', lambda: {'system': self.title, 'candidate_id': winner_id, 'majority': False})
+            self.declare_winner(winner.name)
+
+        else:
+            log.info('* No winner found *')
+
+        # Schulze order, which puts the winner first.
+        order = {candidate_id: place for place, candidate_id in enumerate(self.schulze_ranking)}
+        self.candidates = sorted(self.candidates, key=lambda candidate: order[candidate.id])
+
+        return self.candidates
+
+    def result(self):
+        """
+        Get the outcome of the voting system, with the head-to-head rankings.
+
+        :return: dict: Title, winner ID, candidates, Condorcet winner ID, Copeland and Schulze rankings.
+        """
+
+        result = super().result()
+        result['condorcet_winner_id'] = self.condorcet_winner_id
+        result['copeland_ranking'] = self.copeland_ranking
+        result['schulze_ranking'] = self.schulze_ranking
+        result['pairwise'] = self.pairwise.tolist() if self.pairwise is not None else None
+
+        return result
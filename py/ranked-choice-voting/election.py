@@ -1,26 +1,52 @@
 # Election Class
+import contextlib
+import logging
 import random
-from helpers import uid, ridx, place_str, map_id_to_candidate_index, MIN_CANDIDATES, MAX_CANDIDATES, Candidate, \
-    MIN_VOTERS, MAX_VOTERS, MAX_CHOICES, PERCENTILE, NO_VOTE_PCT_THRESHOLD, NO_VOTE_VAL, show_output, sort_candidates, \
-    FIRST_CHOICE_INDEX
+import numpy as np
+from helpers import uid, place_str, MIN_CANDIDATES, MAX_CANDIDATES, Candidate, CandidateRegistry, \
+    MIN_VOTERS, MAX_VOTERS, MAX_CHOICES, MAX_BALLOT_DEPTH, BALLOT_CHUNK_SIZE, sort_candidates, FIRST_CHOICE_INDEX
 from datetime import date
+from ballot_store import BallotStore
+from ballot_loader import load_ballots
+from events import log, emit, set_verbosity
+from parallel_tally import parallel_election
 
 class Election:
-    def __init__(self):
+    def __init__(self, compress_ballots=False, seed=None, workers=None, choice_cnt=MAX_CHOICES, ballot_file=None):
+        if not 1 <= choice_cnt <= MAX_BALLOT_DEPTH:
+            raise ValueError(f'Ballot depth must be 1 to {MAX_BALLOT_DEPTH} choices: {choice_cnt}')
+
+        self.choice_cnt = choice_cnt # Ranked choices per ballot
+        self.compress_ballots = compress_ballots # Collapse ballots into unique rankings with counts after voting
+        self.seed = seed # Seed to reproduce the same ballots
+        self.rng = np.random.default_rng(seed)
+        self.workers = workers # Generate and count ballots in chunks across this many processes
+        self.ballot_file = ballot_file # Append parallel chunks to this ballot file instead of keeping them in memory
         self.ballots = []
+        self.rank_counts = None # Votes per candidate per rank (candidates x ranks)
         self.candidates = []
-        self.pool = []  # pool of candidates to vote on
+        self.registry = CandidateRegistry(choice_cnt=choice_cnt)
         self.results = [] # Election results
 
-    def election_day(self):
+    def election_day(self, benchmark=None):
         """
         Run the election.
+
+        :param Benchmark benchmark: Times each phase of the election (optional).
         """
 
-        self.register()
-        self.vote()
+        phase = benchmark.phase if benchmark is not None else lambda name: contextlib.nullcontext()
+
+        with phase('registration'):
+            self.register()
+
+        with phase('ballot generation'):
+            self.vote()
+
         self.show_banner()
-        self.tally()
+
+        with phase('tally'):
+            self.tally()
 
     def show_banner(self):
         """
@@ -189,10 +215,8 @@ class Election:
 
         :return: None
         """
-        show_output = False
         if self.validate_input('\nShow output? (y/n) ', True) == 'y':
-            #global show_output
-            show_output = True
+            set_verbosity(logging.DEBUG)
 
         candidate_cnt = self.validate_input(f'How many candidates ({MIN_CANDIDATES} to {MAX_CANDIDATES}) will register for the election?')
 
@@ -231,14 +255,84 @@ class Election:
         # Make sure each uid is unique
         for _ in range(0, candidate_cnt) :
             uid_str = uid()
+            while uid_str in self.registry.indexes:
+                uid_str = uid()
+
             party = random.choice(Election.get_parties())
             full_name = random.choice(full_names['first']) + ' ' + random.choice(full_names['last'])
             print(f'{uid_str} - {full_name} - {party}')
 
-            self.candidates.append(Candidate(uid_str, full_name, party))
+            candidate = Candidate(uid_str, full_name, party)
+            self.candidates.append(candidate)
+            self.registry.register(candidate)
 
         print('-------------------------------------')
 
+    def register_candidates(self, candidates):
+        """
+        Register candidates that are already known, such as the candidates of a cast vote record.
+
+        :param list candidates: Candidate objects in ballot code order.
+
+        :return: None
+        """
+
+        for candidate in candidates:
+            self.candidates.append(candidate)
+            self.registry.register(candidate)
+
+    def load_ballots(self, path, batch_size=BALLOT_CHUNK_SIZE, ballot_file=None, header=True):
+        """
+        Count ballots from a cast vote record file (CSV, JSON lines or Parquet) instead of voting.
+        The file is read in batches, so only the unique rankings are kept in memory, or none with a ballot file.
+
+        :param string path: Path to the cast vote record file.
+        :param int batch_size: Ballots read per batch.
+        :param string ballot_file: Append the batches to this binary ballot file instead of memory (optional).
+        :param bool header: The first line of a CSV file is a header, not a ballot.
+
+        :return: None
+        """
+
+        self.rank_counts, self.ballots = load_ballots(
+            path, self.registry.ids(), batch_size, self.choice_cnt, ballot_file, header, self.registry.candidates
+        )
+        print(f'{len(self.ballots)} ballots loaded as {self.ballots.row_cnt} unique rankings.')
+
+    def save_ballots(self, path):
+        """
+        Write the ballots to a binary ballot file so they can be re-tabulated without voting again.
+
+        :param string path: Path to the ballot file.
+
+        :return: None
+        """
+
+        self.ballots.save(path, self.registry.candidates)
+
+    def open_ballots(self, path):
+        """
+        Open a binary ballot file read-only.  With no candidates registered, the file's candidates are registered;
+        otherwise they must already be registered in ballot code order.
+
+        :param string path: Path to the ballot file.
+
+        :return: None
+
+        :raises: ValueError: If the file's candidate table does not match the registered candidates.
+        """
+
+        ballots = BallotStore.open(path)
+
+        if len(self.registry) == 0:
+            self.register_candidates(ballots.make_candidates())
+
+        elif ballots.candidate_ids != self.registry.ids():
+            raise ValueError(f'Ballot file candidates do not match the registered candidates: {path}')
+
+        self.ballots = ballots
+        self.rank_counts = None
+
     def get_voter_cnt(self):
         """
         Get the number of voters who registered for this election.
@@ -264,95 +358,58 @@ class Election:
     def vote (self):
         """
         Vote in the election.
-        Gets the number of voters and allows them to vote for candidates.
+        Gets the number of voters and generates all of their ballots at once.
         """
 
         # Prompt for voters
         voter_cnt = self.get_voter_cnt()
 
-        # Create a ballot for voters to vote on.
-        choice_cnt = min(MAX_CHOICES, len(self.candidates))
-
         print('\n--- Voting ---')
-        for i in range (0, voter_cnt):
-            self.reset_pool()
-            self.ballots.append([])
-
-            #if show_output == 'y':
-                #print(f'\nNew Ballot {self.ballots[i]}')
-                #print(f'Voter {i} is voting...')
-
-            for _ in range (0, choice_cnt):
-                candidate_chosen = self.mark_candidate()
-                self.ballots[i].append(candidate_chosen)
 
-                #if show_output is True:
-                 #   p_str = place_str(j, 'p')
-                 #   print(f'Voter {i} voted {p_str} for Candidate ID: {candidate_chosen}')
+        # Parallel mode counts each chunk as it is generated and keeps only the unique rankings (or the ballot file).
+        if self.workers is not None:
+            self.rank_counts, self.ballots = parallel_election(
+                self.registry.ids(), voter_cnt, self.seed, self.workers, choice_cnt=self.choice_cnt,
+                path=self.ballot_file, candidates=self.registry.candidates
+            )
+            print(f'{len(self.ballots)} ballots counted as {self.ballots.row_cnt} unique rankings.')
+            return
 
-            # Display ballot for voter
-            print(f'Voter {i} - Ballot: {self.ballots[i]}')
-
-    def mark_candidate (self):
-        """
-        Mark a candidate on the ballot.
-        There is a small chance that a voter does not want to vote for a candidate at all.
-        """
+        self.ballots = BallotStore.generate(self.registry.ids(), voter_cnt, self.rng, self.choice_cnt)
 
-        no_vote_odds = random.randint(0, PERCENTILE)
+        # Display ballot for voter
+        if log.isEnabledFor(logging.DEBUG):
+            for i, ballot in enumerate(self.ballots):
+                log.debug('Voter %d - Ballot: %s', i, ballot)
 
-        # The odds are 10% that a voter does not choose a candidate otherwise vote
-        if no_vote_odds >= NO_VOTE_PCT_THRESHOLD:
-            return self.choose_candidate()
-
-        else:
-            return NO_VOTE_VAL
-
-    def choose_candidate (self):
-        """
-        Chooses a candidate that has yet to be chosen.
-        Note: We can expand this with more thorough logic in choosing a candidate.  For now, just pick at random.
-
-        returns:
-           int: The candidate id chosen.
-        """
-
-        return self.pool.pop(ridx(self.pool))
-
-    def reset_pool (self):
-        """
-        Reset the pool of candidates for new voters to vote on.
-        """
-
-        self.pool = []
-        for i in range (len(self.candidates)):
-            self.pool.append(self.candidates[i].id)
+        if self.compress_ballots:
+            self.ballots = self.ballots.compress()
+            print(f'{len(self.ballots)} ballots compressed to {self.ballots.row_cnt} unique rankings.')
 
     def tally(self):
         """
         Tally votes for each candidate based on the voter's choice.
         """
 
-        for i in range (0, len(self.ballots)):
-            for vote_choice in range (0, len(self.ballots[i])):
-                voted_id = self.ballots[i][vote_choice]
+        # Count every rank of every ballot at once: candidates x ranks.
+        if self.rank_counts is None:
+            self.rank_counts = self.ballots.rank_counts()
 
-                #if show_output is True:
-                #    print(f'Ballot {i} choice {vote_choice} for candidate {voted_id}')
+        self.registry.load_votes(self.ballots, self.rank_counts)
 
-                # Update the corresponding place attribute based on vote_choice.
-                if voted_id != NO_VOTE_VAL:
-                    index = map_id_to_candidate_index(voted_id, self.candidates)
-                    self.candidates[index].votes[vote_choice] += 1
+        if log.isEnabledFor(logging.DEBUG):
+            for vote_choice, blank_cnt in enumerate(self.ballots.blank_counts()):
+                if blank_cnt > 0:
+                    log.debug('Warning: %d voters did not vote for %s.', blank_cnt, place_str(vote_choice, 'p'))
 
-                else:
-                    if show_output is True:
-                        p_str = place_str(vote_choice, 'p')
-                        print(f'Warning: Voter {i} did not vote for {p_str}.')
+        emit('tally', lambda: {
+            'ballot_cnt': len(self.ballots),
+            'votes': {candidate.id: candidate.votes.tolist() for candidate in self.registry}
+        })
 
         print('\n------- BALLOT TALLIES -------')
         for i in range (0, len(self.candidates)):
-            print(f' Candidate {self.candidates[i].id} ', self.candidates[i].votes)
+            print(f' Candidate {self.candidates[i].id} ', self.candidates[i].votes.tolist())
 
         print('------------------------------')
 
@@ -363,24 +420,31 @@ class Election:
 
         self.results.append({'title': title, 'candidates': sorted_candidates})
 
-    def show_results(self, title=''):
+    def show_results(self, title='', candidates=None):
         """
         Output the election results.
 
+        :param string title: Title of the voting system.
+        :param list candidates: Candidates of a voting system (defaults to the election's candidates).
+
         :return:
         """
 
-        self.candidates = sort_candidates(self.candidates)
+        if candidates is None:
+            self.candidates = sort_candidates(self.candidates)
+            candidates = self.candidates
+        else:
+            candidates = sort_candidates(candidates)
 
         # Only show the first result for a popular vote system.
-        if title == 'popular':
+        if title.lower() == 'popular':
             place = place_str(FIRST_CHOICE_INDEX, 'p')
-            print(f'{place}: ({self.candidates[FIRST_CHOICE_INDEX].id}) {self.candidates[FIRST_CHOICE_INDEX].name} - {self.candidates[FIRST_CHOICE_INDEX].party} Party - Total: {self.candidates[FIRST_CHOICE_INDEX].total}')
+            print(f'{place}: ({candidates[FIRST_CHOICE_INDEX].id}) {candidates[FIRST_CHOICE_INDEX].name} - {candidates[FIRST_CHOICE_INDEX].party} Party - Total: {candidates[FIRST_CHOICE_INDEX].total}')
 
         else:
-            for i in range(0, len(self.candidates)):
+            for i in range(0, len(candidates)):
                 place = place_str(i, 'p')
-                print(f'{place}: ({self.candidates[i].id}) {self.candidates[i].name} - {self.candidates[i].party} Party - Total: {self.candidates[i].total}')
+                print(f'{place}: ({candidates[i].id}) {candidates[i].name} - {candidates[i].party} Party - Total: {candidates[i].total}')
 
 
     # Traverse through a list of candidates that participated in the election using the Alternative Voting System.
@@ -402,7 +466,7 @@ class Election:
             print(f'Total/Points: {candidates[i].total} ({totals_pct}%)')
             print('--- Votes ---')
 
-            for j in range (0, MAX_CHOICES):
+            for j in range (0, len(candidates[i].votes)):
                 print(f'{place_str(j, "p")}: {candidates[i].votes[j]}')
 
     def show_results2(self, ces_c, weight_c, next_c):
@@ -0,0 +1,213 @@
+"""
+|--------------------------------------------------------------------------
+| Events
+|--------------------------------------------------------------------------
+| Console verbosity and audit events for the election pipeline.
+|
+| Console: `log` is a standard logger.  Counting loops log with lazy
+| %-style arguments (and guard anything expensive with log.isEnabledFor), so
+| nothing is formatted unless that level is switched on.  Records propagate,
+| so an application's own logging configuration sees them; set_verbosity()
+| also prints them to stdout, for the command line.
+|
+| Listeners and handlers only exist in the process that added them, so
+| worker processes record their log records and events with recording() and
+| the parent replays them in order.
+|
+| Audit: emit() sends structured events (tally, round, eliminate, winner) to
+| listeners such as JsonLinesWriter, which audit_log() attaches to a file.
+| An event's fields are built by a callable that is only called when someone
+| is listening.
+"""
+
+# Import Libraries
+import contextlib
+import json
+import logging
+import sys
+
+log = logging.getLogger('ranked_choice_voting')
+log.addHandler(logging.NullHandler())
+
+console = logging.StreamHandler(sys.stdout) # Prints the messages alone, as the command line always has
+
+listeners = []
+
+
+def set_verbosity(level):
+    """
+    Set the console verbosity, and print log messages to stdout.
+
+    :param int level: Logging level, e.g. logging.INFO for rounds and totals, logging.DEBUG for everything.
+
+    :return: None
+    """
+
+    if console not in log.handlers:
+        log.addHandler(console)
+
+    log.setLevel(level)
+
+
+class Recording(logging.Handler):
+    """
+    Log handler that keeps its records, and audit listener that keeps its events, e.g. in a worker process, so they
+    can be handled again in the parent with replay().
+
+    Attributes:
+        records (list): Log records kept, in order.
+        events (list): Audit events kept, in order, as (event, fields).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.events = []
+
+    def emit(self, record):
+        # Format the message now, so the record pickles without its arguments.
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+
+        self.records.append(record)
+
+    def __call__(self, event, fields):
+        self.events.append((event, fields))
+
+
+@contextlib.contextmanager
+def recording(level, keep_events):
+    """
+    Keep the log records and audit events made inside the block instead of handling them, e.g. to send them back
+    from a worker process.  The worker's own level, handlers and listeners don't matter, so this works however the
+    worker was started.
+
+    :param int level: Logging level to record at (the level of the process that will replay them).
+    :param bool keep_events: Keep audit events (when the replaying process has listeners).
+
+    :return: generator: Yields the Recording.
+    """
+
+    recorder = Recording()
+    saved_level, saved_handlers, saved_listeners = log.level, log.handlers[:], listeners[:]
+
+    # The records propagate when the parent replays them, not here as well.
+    log.setLevel(level)
+    log.handlers = [recorder]
+    log.propagate = False
+    listeners[:] = [recorder] if keep_events else []
+
+    try:
+        yield recorder
+
+    finally:
+        log.setLevel(saved_level)
+        log.handlers = saved_handlers
+        log.propagate = True
+        listeners[:] = saved_listeners
+
+
+def replay(records, events=()):
+    """
+    Handle log records and send audit events that were recorded elsewhere, e.g. in a worker process.
+
+    :param list records: Log records.
+    :param list events: Audit events as (event, fields).
+
+    :return: None
+    """
+
+    for record in records:
+        log.handle(record)
+
+    for event, fields in events:
+        emit(event, lambda fields=fields: fields)
+
+
+def listening():
+    """
+    Is anyone listening for audit events?
+
+    :return: bool: True if there is a listener.
+    """
+
+    return len(listeners) > 0
+
+
+def add_listener(listener):
+    """
+    Listen for audit events.
+
+    :param callable listener: Called with (event, fields) for every event.
+
+    :return: None
+    """
+
+    listeners.append(listener)
+
+
+def remove_listener(listener):
+    """
+    Stop listening for audit events.
+
+    :param callable listener: A listener that was added.
+
+    :return: None
+    """
+
+    listeners.remove(listener)
+
+
+def emit(event, build_fields):
+    """
+    Send an audit event to every listener.
+
+    :param string event: Event name.
+    :param callable build_fields: Returns the event's fields as a dict; not called when nobody is listening.
+
+    :return: None
+    """
+
+    if len(listeners) == 0:
+        return
+
+    fields = build_fields()
+    for listener in listeners:
+        listener(event, fields)
+
+
+class JsonLinesWriter:
+    """
+    Audit listener that writes one JSON object per event.
+
+    Attributes:
+        file (file): Open text file to write to.
+    """
+
+    def __init__(self, file):
+        self.file = file
+
+    def __call__(self, event, fields):
+        self.file.write(json.dumps({'event': event, **fields}) + '\n')
+
+
+@contextlib.contextmanager
+def audit_log(path):
+    """
+    Write the audit events sent inside the block to a JSON lines file.
+
+    :param string path: Path to the file (appended to).
+
+    :return: generator: Yields the JsonLinesWriter.
+    """
+
+    with open(path, 'a') as file:
+        writer = JsonLinesWriter(file)
+        add_listener(writer)
+
+        try:
+            yield writer
+
+        finally:
+            remove_listener(writer)
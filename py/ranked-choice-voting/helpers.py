@@ -5,81 +5,421 @@
 """
 
 # Import Libraries
-import random
+import math
 import uuid
+from fractions import Fraction
+import numpy as np
 
 # Helper functions
 FIRST_CHOICE_INDEX = 0
-MAX_CHOICES = 4
+MAX_CHOICES = 4 # Default ballot depth (ranked choices per ballot)
+MAX_BALLOT_DEPTH = 10 # Deepest ballot an election can use
 
 MIN_VOTERS = 9 #25
 MAX_VOTERS = 15 #168000000
 
 MIN_CANDIDATES = 2
 MEDIAN_CANDIDATES = 8
-MAX_CANDIDATES = 10 #128
+MAX_CANDIDATES = 128
 
 NO_VOTE_VAL = ''
 NO_VOTE_PCT_THRESHOLD = 3
 
+BALLOT_CHUNK_SIZE = 250000 # Ballots generated per block
+PARALLEL_CHUNK_SIZE = 1000000 # Ballots generated and counted per worker task
+
 PERCENTILE = 100
-show_output = False
+
+MAX_WEIGHT_DENOMINATOR = 1000000 # Rank weights are read as fractions with at most this denominator
+MAX_INT64 = 2 ** 63 - 1 # Largest count or score NumPy can hold in int64
+
+# Candidate status codes in a CandidateTable
+IN_POOL = 0
+WINNER = 1
+REMOVED = 2
+
+# Candidate state as parallel arrays
+class CandidateTable:
+    """
+    Candidate state as parallel NumPy arrays, one row per candidate.  Candidate objects are thin views of a row, so a
+    voting system can update every total with one vector operation, and copying the table snapshots every candidate.
+
+    Attributes:
+        ids (list): Candidate IDs by row.
+        names (list): Candidate names by row.
+        parties (list): Candidate parties by row.
+        votes (numpy.ndarray): Votes per rank (candidates x ranks).
+        totals (numpy.ndarray): Total points; integers until a fractional total is stored.
+        sys_totals (numpy.ndarray): Weighted totals across voting systems.
+        status (numpy.ndarray): IN_POOL, WINNER or REMOVED.
+        labels_shared (bool): The ID, name and party lists are shared with a fork and are copied before the next add.
+    """
+
+    def __init__(self, choice_cnt=MAX_CHOICES):
+        self.ids = []
+        self.names = []
+        self.parties = []
+        self.votes = np.zeros((0, choice_cnt), dtype=np.int64)
+        self.totals = np.zeros(0, dtype=np.int64)
+        self.sys_totals = np.zeros(0, dtype=np.float64)
+        self.status = np.zeros(0, dtype=np.int8)
+        self.labels_shared = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, u_id, name, party):
+        """
+        Add a row for a new candidate.
+
+        :param string u_id: Candidate ID.
+        :param string name: Candidate name.
+        :param string party: Candidate party.
+
+        :return: int: Row of the candidate.
+        """
+
+        if self.labels_shared:
+            self.ids, self.names, self.parties = list(self.ids), list(self.names), list(self.parties)
+            self.labels_shared = False
+
+        self.ids.append(u_id)
+        self.names.append(name)
+        self.parties.append(party)
+        self.votes = np.vstack([self.votes, np.zeros((1, self.votes.shape[1]), dtype=self.votes.dtype)])
+        self.totals = np.append(self.totals, self.totals.dtype.type(0))
+        self.sys_totals = np.append(self.sys_totals, 0.0)
+        self.status = np.append(self.status, np.int8(IN_POOL))
+
+        return len(self.ids) - 1
+
+    def fork(self):
+        """
+        Snapshot the table.  The counts, totals and statuses are copied; the ID, name and party lists are shared until
+        either table adds a candidate.
+
+        :return: CandidateTable: The snapshot.
+        """
+
+        table = CandidateTable.__new__(CandidateTable)
+        table.ids, table.names, table.parties = self.ids, self.names, self.parties
+        table.votes = self.votes.copy()
+        table.totals = self.totals.copy()
+        table.sys_totals = self.sys_totals.copy()
+        table.status = self.status.copy()
+        table.labels_shared = self.labels_shared = True
+
+        return table
+
+    def widen_totals(self):
+        """
+        Store totals as floats, e.g. for fractional points.
+
+        :return: None
+        """
+
+        if self.totals.dtype.kind != 'f':
+            self.totals = self.totals.astype(np.float64)
+
+    def widen_votes(self, choice_cnt):
+        """
+        Make room for more ranks in the votes matrix.
+
+        :param int choice_cnt: Number of ranks.
+
+        :return: None
+        """
+
+        if choice_cnt > self.votes.shape[1]:
+            votes = np.zeros((len(self), choice_cnt), dtype=self.votes.dtype)
+            votes[:, :self.votes.shape[1]] = self.votes
+            self.votes = votes
 
 # Create a candidate object
 class Candidate:
-    def __init__(self, u_id, name, party):
-        self.id = u_id
-        self.name = name
-        self.party = party
-        self.is_winner = None # False = removed from pool, True = winner, None = still in pool
-        self.votes = [0, 0, 0, 0]
-        self.total = 0
-        self.sys_totals = 0
+    """
+    A candidate: a view of one row of a CandidateTable.  A new candidate gets a table of its own until it is
+    registered in a CandidateRegistry.
 
-def map_id_to_candidate_index (voted_id, candidates):
+    Attributes:
+        table (CandidateTable): Table that holds the candidate's state.
+        index (int): Row of the candidate in the table.
     """
-    Map the ID of a candidate to the index of the candidate.
 
-    :param int voted_id: ID of a candidate.
-    :param candidates candidates:  List of candidates.
+    __slots__ = ('table', 'index')
+
+    def __init__(self, u_id, name, party):
+        self.table = CandidateTable()
+        self.index = self.table.add(u_id, name, party)
+
+    @classmethod
+    def view(cls, table, index):
+        """
+        Get a candidate that views an existing row of a table.
+
+        :param CandidateTable table: The table.
+        :param int index: Row of the candidate.
+
+        :return: Candidate: The view.
+        """
+
+        candidate = cls.__new__(cls)
+        candidate.table, candidate.index = table, index
+
+        return candidate
+
+    def move_to(self, table):
+        """
+        Copy the candidate's state into a row of another table and view that row from now on.
+
+        :param CandidateTable table: The new table.
+
+        :return: None
+        """
+
+        old_table, old_index = self.table, self.index
+
+        index = table.add(self.id, self.name, self.party)
+        table.widen_votes(old_table.votes.shape[1])
+        table.votes[index, :old_table.votes.shape[1]] = old_table.votes[old_index]
+
+        if old_table.totals.dtype.kind == 'f':
+            table.widen_totals()
+
+        table.totals[index] = old_table.totals[old_index]
+        table.sys_totals[index] = old_table.sys_totals[old_index]
+        table.status[index] = old_table.status[old_index]
+
+        self.table, self.index = table, index
+
+    @property
+    def id(self):
+        return self.table.ids[self.index]
+
+    @property
+    def name(self):
+        return self.table.names[self.index]
+
+    @property
+    def party(self):
+        return self.table.parties[self.index]
+
+    @property
+    def is_winner(self):
+        """
+        False = removed from pool, True = winner, None = still in pool
+        """
+
+        status = self.table.status[self.index]
+        return None if status == IN_POOL else bool(status == WINNER)
+
+    @is_winner.setter
+    def is_winner(self, value):
+        self.table.status[self.index] = IN_POOL if value is None else (WINNER if value else REMOVED)
+
+    @property
+    def votes(self):
+        return self.table.votes[self.index]
+
+    @votes.setter
+    def votes(self, value):
+        self.table.widen_votes(len(value))
+        self.table.votes[self.index] = 0
+        self.table.votes[self.index, :len(value)] = value
 
-    :return: int index: Index of the candidate.
+    @property
+    def total(self):
+        return self.table.totals[self.index].item()
+
+    @total.setter
+    def total(self, value):
+        if isinstance(value, (float, np.floating)):
+            self.table.widen_totals()
+
+        self.table.totals[self.index] = value
+
+    @property
+    def sys_totals(self):
+        return self.table.sys_totals[self.index].item()
+
+    @sys_totals.setter
+    def sys_totals(self, value):
+        self.table.sys_totals[self.index] = value
+
+# Registry of candidates in registration order
+class CandidateRegistry:
+    """
+    Constant-time candidate lookups.  A candidate's index is its registration order (and its ballot code), so the
+    registry stays valid when a voting system re-sorts its list of candidates.  Registered candidates are views of the
+    registry's table, whose rows are in the same order.
+
+    Attributes:
+        candidates (list): Candidates in registration order.
+        indexes (dict): Candidate ID to index lookup.
+        table (CandidateTable): State of every registered candidate, by index.
     """
 
-    for index in range (0, len(candidates)):
-        if voted_id == candidates[index].id:
-            return index
+    def __init__(self, candidates=(), choice_cnt=MAX_CHOICES):
+        self.candidates = []
+        self.indexes = {}
+        self.table = CandidateTable(choice_cnt)
+
+        for candidate in candidates:
+            self.register(candidate)
+
+    @classmethod
+    def for_store(cls, candidates, ballots, rank_counts=None):
+        """
+        Build the registry a voting system tabulates a ballot store with: the candidates in ballot code order, with
+        the store's rank counts as their votes.  The candidates move into the registry's table, so pass copies (see
+        tabulation_runner.fresh_candidates) to leave the caller's alone.
+
+        :param list candidates: Candidate objects, in any order.
+        :param BallotStore ballots: The ballots.
+        :param numpy.ndarray rank_counts: Rank counts already counted from the ballots (optional).
+
+        :return: CandidateRegistry: The registry.
+        """
+
+        registry = cls(sorted(candidates, key=lambda candidate: ballots.codes[candidate.id]), ballots.choice_cnt)
+        registry.load_votes(ballots, rank_counts)
+
+        return registry
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def __iter__(self):
+        return iter(self.candidates)
+
+    def load_votes(self, ballots, rank_counts=None):
+        """
+        Set every candidate's votes to the rank counts of a ballot store.  Registry indexes are ballot codes, so the
+        rank counts are the table's votes matrix; the weighted, redistribution and tie-break paths all read it.
+
+        :param BallotStore ballots: The ballots.
+        :param numpy.ndarray rank_counts: Rank counts already counted from the ballots (default: count them).
+
+        :return: None
+
+        :raises: ValueError: If the registry's candidates are not the store's, in ballot code order.
+        """
+
+        if self.ids() != ballots.candidate_ids:
+            raise ValueError('Registered candidates do not match the ballot codes.')
+
+        self.table.votes = np.array(ballots.rank_counts() if rank_counts is None else rank_counts, dtype=np.int64)
+
+    def register(self, candidate):
+        """
+        Add a candidate to the registry.  The candidate's state moves into the registry's table.
+
+        :param Candidate candidate: Candidate object.
+
+        :return: int index: Index of the candidate.
+        """
+
+        candidate.move_to(self.table)
 
-# Better way to map ID to candidate index
-def map_id_to_candidate_index2(voted_id, candidates):
-    candidate_dict = {candidate.id: index for index, candidate in enumerate(candidates)}
-    return candidate_dict.get(voted_id)
+        self.indexes[candidate.id] = len(self.candidates)
+        self.candidates.append(candidate)
+
+        return self.indexes[candidate.id]
+
+    def fork(self):
+        """
+        Snapshot the registry so a voting system can change totals and statuses without touching the original.
+        Costs one copy of the table's arrays, not a copy of every candidate object.
+
+        :return: CandidateRegistry: A registry of new candidate views over a fork of the table.
+        """
+
+        registry = CandidateRegistry()
+        registry.table = self.table.fork()
+        registry.candidates = [Candidate.view(registry.table, candidate.index) for candidate in self.candidates]
+        registry.indexes = dict(self.indexes)
+
+        return registry
+
+    def ids(self):
+        """
+        Get the candidate IDs in registration order.
+
+        :return: list: Candidate IDs.
+        """
+
+        return [candidate.id for candidate in self.candidates]
+
+    def index_of(self, voted_id):
+        """
+        Map the ID of a candidate to its index.
+
+        :param string voted_id: ID of a candidate.
+
+        :return: int index: Index of the candidate.
+        """
+
+        return self.indexes[voted_id]
+
+    def get(self, index):
+        """
+        Get a candidate by index.
+
+        :param int index: Index of the candidate.
+
+        :return: Candidate: Candidate object.
+        """
+
+        return self.candidates[index]
+
+    def find(self, voted_id):
+        """
+        Get a candidate by ID.
+
+        :param string voted_id: ID of a candidate.
+
+        :return: Candidate: Candidate object.
+        """
+
+        return self.candidates[self.indexes[voted_id]]
 
 def place_str (place, mode):
     """
     Get the placement string for a candidate.
 
-    :param int place: What order of placement.
+    :param int place: What order of placement (0 = first).
     :param string mode: What type of placement string to output.
 
-    :return: string attrs[place]: String of the placement.
+    :return: string: String of the placement, e.g. 'third' or '3rd Place'.
     """
-    if mode == 'a':
-        attrs = ['first', 'second', 'third', 'fourth']
-    else:
-        attrs = ['1st Place', '2nd Place', '3rd Place', '4th Place']
+    attrs = ['first', 'second', 'third', 'fourth', 'fifth', 'sixth', 'seventh', 'eighth', 'ninth', 'tenth']
+
+    if mode == 'a' and place < len(attrs):
+        return attrs[place]
+
+    num = place + 1
+    suffix = 'th' if 10 <= num % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(num % 10, 'th')
 
-    return attrs[place]
+    return f'{num}{suffix}' if mode == 'a' else f'{num}{suffix} Place'
 
-def ridx (var):
+def fixed_point_weights(weights):
     """
-    Get a random index.
+    Turn rank weights into integer points on a common scale, so scores add up exactly in any order.
+    E.g. [1, 1/2, 1/4, 1/8] -> ([8, 4, 2, 1], 8).
 
-    :param string var: string to get a random index from.
-    :return int random.randint(0, len(var) - 1): Random index.
+    :param list weights: Weight of each rank (ints, floats or Fractions).
+
+    :return: tuple: Integer points per rank (numpy.ndarray; Python ints in an object array if the points or the scale
+        don't fit in int64) and the scale (points = weight * scale).
     """
 
-    return random.randint(0, len(var) - 1)
+    fractions = [Fraction(weight).limit_denominator(MAX_WEIGHT_DENOMINATOR) for weight in weights]
+    scale = math.lcm(*(fraction.denominator for fraction in fractions))
+    points = [int(fraction * scale) for fraction in fractions]
+
+    dtype = np.int64 if max([scale, *map(abs, points)]) <= MAX_INT64 else object
+
+    return np.array(points, dtype=dtype), scale
 
 def uid(length = 4):
     """
@@ -0,0 +1,152 @@
+"""
+|--------------------------------------------------------------------------
+| Instrumentation
+|--------------------------------------------------------------------------
+| Time each phase of the election pipeline (registration, ballot generation,
+| tally, each voting system, aggregation), count the work done in each
+| elimination round and record peak memory.  The report is a JSON object
+| keyed by the benchmark ID; save() appends it as one line to a JSON lines
+| log so runs can be compared between releases.
+"""
+
+# Import Libraries
+import contextlib
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None # Not available on Windows
+
+
+def peak_memory():
+    """
+    Get the peak resident memory of this process and of its finished child processes.
+
+    :return: dict: Peak bytes for 'self' and 'children', or None where it can't be measured.
+    """
+
+    if resource is None:
+        return {'self': None, 'children': None}
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    scale = 1 if sys.platform == 'darwin' else 1024
+
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    }
+
+
+class Benchmark:
+    """
+    Timers and counters for one run of the election pipeline.
+
+    Attributes:
+        benchmark_id (str): ID of the run.
+        started_at (str): When the run started (ISO 8601).
+        phases (dict): Phase name to elapsed seconds.
+        counters (dict): Counter name to count.
+        systems (dict): Voting system title to its runtime, rounds and per-round work.
+    """
+
+    def __init__(self, benchmark_id):
+        self.benchmark_id = benchmark_id
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.phases = {}
+        self.counters = {}
+        self.systems = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Time a phase of the pipeline.  Timing the same phase again adds to it.
+
+        :param string name: Name of the phase.
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - start
+
+    def count(self, name, amount=1):
+        """
+        Add to a counter.
+
+        :param string name: Name of the counter.
+        :param int amount: Amount to add.
+
+        :return: None
+        """
+
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_system(self, result):
+        """
+        Record a voting system's result from the tabulation runner.
+
+        :param dict result: Result with title, runtime, round_cnt and round_stats.
+
+        :return: None
+        """
+
+        self.systems[result['title']] = {
+            'runtime': result['runtime'],
+            'round_cnt': result['round_cnt'],
+            'rounds': result['round_stats']
+        }
+
+        self.count('candidates_eliminated', len(result['round_stats']))
+        self.count('ballots_moved', sum(round_stat['ballots_moved'] for round_stat in result['round_stats']))
+
+    def report(self):
+        """
+        Build the machine-readable report.
+
+        :return: dict: The report.
+        """
+
+        return {
+            'benchmark_id': self.benchmark_id,
+            'started_at': self.started_at,
+            'phases': self.phases,
+            'systems': self.systems,
+            'counters': self.counters,
+            'peak_memory': peak_memory(),
+            'python': platform.python_version(),
+            'numpy': np.__version__
+        }
+
+    def save(self, path):
+        """
+        Append the report to a JSON lines log.
+
+        :param string path: Path to the log.
+
+        :return: None
+        """
+
+        with open(path, 'a') as file:
+            file.write(json.dumps(self.report()) + '\n')
+
+    def show(self):
+        """
+        Output the phase timings.
+
+        :return: None
+        """
+
+        print(f'\n--- Benchmark {self.benchmark_id} ---')
+
+        for name, seconds in self.phases.items():
+            print(f'{name}: {seconds:.4f}s')
+
+        for title, system in self.systems.items():
+            print(f'{title}: {system["runtime"]:.4f}s, {system["round_cnt"]} rounds')
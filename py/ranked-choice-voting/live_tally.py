@@ -0,0 +1,171 @@
+"""
+|--------------------------------------------------------------------------
+| Live Tally
+|--------------------------------------------------------------------------
+| Tabulate an election while its ballots arrive in batches (e.g. precinct by
+| precinct on election night) and republish the standings after each batch.
+|
+| add_ballots() folds a batch into running counts: the rank-count matrix,
+| the pairwise matrix, the transfer tensor and a table of unique rankings
+| with the first-choice pile of each candidate.  Only the batch is counted;
+| a ranking already in the table just has its weight raised, and a new one
+| is appended, so earlier row numbers (and the piles) stay valid.
+|
+| standings() runs the voting systems on the unique rankings and hands each
+| one the counts it would otherwise recount, so republishing costs one pass
+| over the unique rankings at most, never over the whole electorate.
+"""
+
+# Import Libraries
+import numpy as np
+from ballot_loader import encode_batch
+from ballot_store import BallotStore, RankingTable
+from condorcet_sys import CondorcetSystem
+from events import log, emit
+from helpers import CandidateRegistry, FIRST_CHOICE_INDEX, MAX_CHOICES
+from redistribution_sys import RedistributionSystem
+from rem_candidates_sys import RemainingCandidatesSystem
+from tabulation_runner import SYSTEMS, fresh_candidates, run_system
+
+
+class LiveTally:
+    """
+    Running counts of an election whose ballots arrive in batches.
+
+    Attributes:
+        registry (CandidateRegistry): Candidates in ballot code order; its votes matrix is the rank counts.
+        table (RankingTable): Unique rankings and their weights, with the keys to look batches up in.
+        rankings (BallotStore): Unique rankings and their weights, in the order they were first seen (table.store).
+        rank_counts (numpy.ndarray): Vote counts (candidates x choices).
+        pairwise (numpy.ndarray): Pairwise counts (candidates x candidates).
+        transfers (numpy.ndarray): Transfer counts (choices - 1 x candidates x candidates).
+        piles (dict): Candidate code to a list of arrays of the ranking rows with that first choice.
+        batch_cnt (int): Number of batches added.
+    """
+
+    def __init__(self, candidates, choice_cnt=MAX_CHOICES):
+        self.registry = CandidateRegistry(fresh_candidates(candidates), choice_cnt)
+
+        candidate_cnt = len(self.registry)
+
+        self.table = RankingTable(self.registry.ids(), choice_cnt)
+        self.rankings = self.table.store
+
+        self.rank_counts = np.zeros((candidate_cnt, choice_cnt), dtype=np.int64)
+        self.pairwise = np.zeros((candidate_cnt, candidate_cnt), dtype=np.int64)
+        self.transfers = np.zeros((max(choice_cnt - 1, 0), candidate_cnt, candidate_cnt), dtype=np.int64)
+        self.piles = {}
+
+        self.batch_cnt = 0
+
+    def add_ballots(self, batch):
+        """
+        Count a batch of ballots into the running counts.
+
+        :param BallotStore batch: The batch, or lists of candidate IDs.
+
+        :return: int: Number of ballots in the batch.
+
+        :raises: ValueError: If the batch's candidate table or ballot depth does not match the tally's.
+        """
+
+        if not isinstance(batch, BallotStore):
+            batch = encode_batch(batch, self.rankings.candidate_ids, self.rankings.choice_cnt)
+
+        elif batch.candidate_ids != self.rankings.candidate_ids or batch.choice_cnt != self.rankings.choice_cnt:
+            raise ValueError('Ballot batch candidates or depth do not match the live tally.')
+
+        # Count the batch's unique rankings only.
+        unique = batch.compress()
+
+        self.rank_counts += unique.rank_counts()
+        self.pairwise += unique.pairwise_counts()
+        self.transfers += unique.transfer_counts()
+        self.add_rankings(unique)
+
+        self.batch_cnt += 1
+        ballot_cnt = unique.ballot_cnt()
+
+        log.info('Batch %d: %d ballots, %d unique rankings in all.', self.batch_cnt, ballot_cnt, self.rankings.row_cnt)
+        emit('batch', lambda: {
+            'batch': self.batch_cnt,
+            'ballot_cnt': ballot_cnt,
+            'total_ballot_cnt': self.rankings.ballot_cnt()
+        })
+
+        return ballot_cnt
+
+    def add_rankings(self, unique):
+        """
+        Add a batch's unique rankings to the rankings table.  Known rankings get the batch's weight; new rankings are
+        appended and put in the pile of their first choice.
+
+        :param BallotStore unique: The batch, compressed.
+
+        :return: None
+        """
+
+        rows = self.table.add(unique)
+
+        first_choices = self.rankings.matrix[rows, FIRST_CHOICE_INDEX]
+        for code in np.unique(first_choices):
+            if code != self.rankings.no_vote:
+                self.piles.setdefault(int(code), []).append(rows[first_choices == code])
+
+    def share_counts(self, system):
+        """
+        Hand a voting system the running counts it would otherwise count from the ballots.
+
+        :param VotingSystem system: The system, before it tabulates.
+
+        :return: None
+        """
+
+        if isinstance(system, RedistributionSystem):
+            system.transfers = self.transfers
+
+        elif isinstance(system, CondorcetSystem):
+            system.pairwise = self.pairwise
+
+        elif isinstance(system, RemainingCandidatesSystem):
+            # The system pops piles as it eliminates candidates, so it gets its own lists.
+            system.piles = {code: list(pile) for code, pile in self.piles.items()}
+
+    def standings(self, systems=None):
+        """
+        Tabulate the ballots counted so far.
+
+        :param list systems: VotingSystem subclasses to run (default: every system in SYSTEMS).
+
+        :return: list: One result per system.
+        """
+
+        systems = list(SYSTEMS.values()) if systems is None else systems
+
+        self.registry.load_votes(self.rankings, self.rank_counts)
+
+        return [
+            run_system(system_cls, self.registry, self.rankings, prepare=self.share_counts)
+            for system_cls in systems
+        ]
+
+    def leaders(self, systems=None):
+        """
+        Get each system's current leader: its winner, or else its top candidate.
+
+        :param list systems: VotingSystem subclasses to run (default: every system in SYSTEMS).
+
+        :return: dict: System title to the leading candidate's ID; empty before any ballots are counted.
+        """
+
+        if self.rankings.ballot_cnt() == 0:
+            return {}
+
+        leaders = {}
+        for result in self.standings(systems):
+            if result['winner_id'] is not None:
+                leaders[result['title']] = result['winner_id']
+            else:
+                leaders[result['title']] = result['candidates'][FIRST_CHOICE_INDEX].id if result['candidates'] else None
+
+        return leaders
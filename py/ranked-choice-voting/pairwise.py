@@ -0,0 +1,129 @@
+"""
+|--------------------------------------------------------------------------
+| Pairwise Engine
+|--------------------------------------------------------------------------
+| Head-to-head comparisons of every pair of candidates.  The pairwise matrix
+| (candidates x candidates) counts how many voters rank one candidate above
+| another; every method below works on the matrix alone, so they cost
+| O(candidates^2) memory however many voters there are.
+|
+| - Condorcet winner: beats every other candidate head-to-head (may not exist).
+| - Copeland: head-to-head wins minus losses.
+| - Schulze: ranks candidates by the strongest paths of pairwise wins; always
+|   agrees with the Condorcet winner when there is one.
+|
+| For large electorates the matrix is counted in chunks of rows across a
+| process pool and the chunk matrices are added up.
+"""
+
+# Import Libraries
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from helpers import PARALLEL_CHUNK_SIZE
+
+
+def count_chunk(store):
+    """
+    Count the pairwise matrix of one chunk of ballots.
+
+    :param BallotStore store: The chunk.
+
+    :return: tuple: Pairwise counts (candidates x candidates) and the number of ballots counted.
+    """
+
+    return store.pairwise_counts(), store.ballot_cnt()
+
+
+def pairwise_counts(store, workers=None, chunk_size=PARALLEL_CHUNK_SIZE):
+    """
+    Count the pairwise matrix of a ballot store, in chunks across a process pool when workers is set.
+
+    :param BallotStore store: Ballots of the election.
+    :param int workers: Number of worker processes (default: count in this process).
+    :param int chunk_size: Most ballot rows in one chunk.
+
+    :return: numpy.ndarray: Pairwise counts (candidates x candidates) in code order.
+    """
+
+    if workers is None or store.row_cnt <= chunk_size:
+        return store.pairwise_counts()
+
+    chunks = [store.slice(start, start + chunk_size) for start in range(0, store.row_cnt, chunk_size)]
+    pairwise = np.zeros((len(store.candidate_ids), len(store.candidate_ids)), dtype=np.int64)
+    ballot_cnt = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_pairwise, chunk_ballot_cnt in executor.map(count_chunk, chunks):
+            pairwise += chunk_pairwise
+            ballot_cnt += chunk_ballot_cnt
+
+    # Each chunk must reach its worker as exactly its own rows, or ballots are counted twice.
+    if ballot_cnt != store.ballot_cnt():
+        raise RuntimeError(f'Pairwise chunks counted {ballot_cnt} ballots, expected {store.ballot_cnt()}.')
+
+    return pairwise
+
+
+def condorcet_winner(pairwise):
+    """
+    Find the candidate who beats every other candidate head-to-head.
+
+    :param numpy.ndarray pairwise: Pairwise counts (candidates x candidates).
+
+    :return: int: Index of the Condorcet winner, or None if there isn't one.
+    """
+
+    beats = pairwise > pairwise.T
+    np.fill_diagonal(beats, True)
+
+    winners = np.flatnonzero(beats.all(axis=1))
+
+    return int(winners[0]) if len(winners) == 1 else None
+
+
+def copeland_scores(pairwise):
+    """
+    Score each candidate by head-to-head wins minus losses.
+
+    :param numpy.ndarray pairwise: Pairwise counts (candidates x candidates).
+
+    :return: numpy.ndarray: Copeland score per candidate.
+    """
+
+    return np.sign(pairwise - pairwise.T).sum(axis=1)
+
+
+def schulze_strengths(pairwise):
+    """
+    Compute the strength of the strongest path from each candidate to each other candidate.  A path is a chain of
+    head-to-head wins; its strength is its weakest win.  Floyd-Warshall, one candidate at a time over whole arrays.
+
+    :param numpy.ndarray pairwise: Pairwise counts (candidates x candidates).
+
+    :return: numpy.ndarray: Strongest path strengths (candidates x candidates).
+    """
+
+    strengths = np.where(pairwise > pairwise.T, pairwise, 0)
+
+    for k in range(0, len(strengths)):
+        strengths = np.maximum(strengths, np.minimum(strengths[:, k, np.newaxis], strengths[np.newaxis, k, :]))
+
+    np.fill_diagonal(strengths, 0)
+
+    return strengths
+
+
+def schulze_ranking(pairwise):
+    """
+    Rank candidates by the Schulze method: by how many candidates each one beats on strongest paths.
+
+    :param numpy.ndarray pairwise: Pairwise counts (candidates x candidates).
+
+    :return: tuple: Candidate indexes from best to worst, and the number of candidates each one beats.
+    """
+
+    strengths = schulze_strengths(pairwise)
+    beaten_cnts = (strengths > strengths.T).sum(axis=1)
+
+    # Stable sort, so equal candidates keep code order.
+    return np.argsort(-beaten_cnts, kind='stable'), beaten_cnts
@@ -0,0 +1,119 @@
+"""
+|--------------------------------------------------------------------------
+| Parallel Tally
+|--------------------------------------------------------------------------
+| Generate and count an electorate in chunks across worker processes.  Each
+| chunk gets its own random stream spawned from one seed, so the result is
+| the same for any number of workers.  Workers send back a candidates x ranks
+| count matrix and, optionally, their unique rankings with counts.
+|
+| The parent folds each chunk in as it arrives, with only a few chunks in
+| flight per worker.  Kept in memory, the unique rankings still grow with the
+| number of distinct rankings, which nears the number of ballots when there
+| are many candidates; given a ballot file path, the chunks are appended to
+| the file instead and memory is bounded by the chunks in flight.
+"""
+
+# Import Libraries
+import collections
+import contextlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ballot_store import BallotFileWriter, BallotStore, RankingTable
+from helpers import MAX_CHOICES, PARALLEL_CHUNK_SIZE
+
+
+def split_electorate(voter_cnt, chunk_size=PARALLEL_CHUNK_SIZE):
+    """
+    Split the electorate into chunk sizes.
+
+    :param int voter_cnt: Number of voters.
+    :param int chunk_size: Most voters in one chunk.
+
+    :return: list: Number of voters in each chunk.
+    """
+
+    return [min(chunk_size, voter_cnt - start) for start in range(0, voter_cnt, chunk_size)]
+
+
+def tally_chunk(candidate_ids, voter_cnt, seed_seq, choice_cnt=MAX_CHOICES, keep_rankings=True):
+    """
+    Generate and count one chunk of ballots.
+
+    :param list candidate_ids: Candidate IDs in registration order.
+    :param int voter_cnt: Number of voters in the chunk.
+    :param numpy.random.SeedSequence seed_seq: Random stream for the chunk.
+    :param int choice_cnt: Number of ranked choices on each ballot.
+    :param bool keep_rankings: Return the chunk's unique rankings as well as its counts.
+
+    :return: tuple: Rank counts (candidates x choices) and the compressed chunk (or None).
+    """
+
+    store = BallotStore.generate(candidate_ids, voter_cnt, np.random.default_rng(seed_seq), choice_cnt)
+    rank_counts = store.rank_counts()
+
+    if keep_rankings:
+        return rank_counts, store.compress()
+
+    return rank_counts, None
+
+
+def parallel_election(candidate_ids, voter_cnt, seed=None, workers=None, chunk_size=PARALLEL_CHUNK_SIZE,
+                      choice_cnt=MAX_CHOICES, keep_rankings=True, path=None, candidates=None):
+    """
+    Generate and count an electorate across a process pool and reduce the chunk results as they arrive.
+
+    :param list candidate_ids: Candidate IDs in registration order.
+    :param int voter_cnt: Number of voters.
+    :param int seed: Seed for the random streams (optional).
+    :param int workers: Number of worker processes (default: one per core).
+    :param int chunk_size: Most voters in one chunk.
+    :param int choice_cnt: Number of ranked choices on each ballot.
+    :param bool keep_rankings: Also keep the chunks' unique rankings.
+    :param string path: Append the chunks' rankings to this ballot file and map it, instead of keeping them in memory
+        (optional).
+    :param list candidates: Candidates in registration order, for the names and parties in the ballot file (default:
+        the bare IDs).
+
+    :return: tuple: Rank counts (candidates x choices) and the unique rankings (or None).
+    """
+
+    chunks = split_electorate(voter_cnt, chunk_size)
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(chunks))
+    workers = workers or os.cpu_count() or 1
+
+    rank_counts = np.zeros((len(candidate_ids), choice_cnt), dtype=np.int64)
+    table = RankingTable(candidate_ids, choice_cnt)
+
+    def fold(future):
+        chunk_counts, chunk_rankings = future.result()
+        rank_counts[:] += chunk_counts
+
+        if writer is not None:
+            writer.append(chunk_rankings)
+        elif keep_rankings:
+            table.add(chunk_rankings)
+
+    with contextlib.ExitStack() as stack:
+        writer = None
+        if keep_rankings and path is not None:
+            writer = stack.enter_context(BallotFileWriter(path, candidates or candidate_ids, choice_cnt))
+
+        executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+        pending = collections.deque()
+
+        for chunk, seed_seq in zip(chunks, seed_seqs):
+            pending.append(executor.submit(tally_chunk, candidate_ids, chunk, seed_seq, choice_cnt, keep_rankings))
+
+            # Keep a few chunks in flight per worker, so finished chunks never pile up in the parent.
+            if len(pending) > 2 * workers:
+                fold(pending.popleft())
+
+        while pending:
+            fold(pending.popleft())
+
+        if writer is not None:
+            return rank_counts, writer.close()
+
+    return rank_counts, table.store if keep_rankings else None
@@ -11,13 +11,14 @@
 """
 
 # Import Libraries
-from helpers import FIRST_CHOICE_INDEX, show_output, map_id_to_candidate_index, sort_candidates
+from events import log
+from helpers import FIRST_CHOICE_INDEX
 from voting_sys import VotingSystem
 
 
 class PopularVoteSystem(VotingSystem):
-    def __init__(self, candidates, ballots):
-        super().__init__(candidates, ballots)
+    def __init__(self, candidates, ballots, registry=None):
+        super().__init__(candidates, ballots, registry)
         self.title = 'Popular'
         self.show_banner()
 
@@ -28,7 +29,19 @@ class PopularVoteSystem(VotingSystem):
         :return:
         """
 
+        # The tallied votes matrix already holds every first choice count, so the ballots are not counted again.
+        self.registry.table.totals[:] = self.registry.table.votes[:, FIRST_CHOICE_INDEX]
+
         for candidate in self.candidates:
-            candidate.total = 0
-            candidate.total += sum([ballot[FIRST_CHOICE_INDEX].count(candidate.id) for ballot in self.ballots])
-            print(f'Candidate: {candidate.id} Total: {candidate.total}')
+            log.info('Candidate: %s Total: %s', candidate.id, candidate.total)
+
+    def tabulate(self):
+        """
+        Score the ballots and determine the winner by the highest total.
+
+        :return: list: Candidates ordered by total points.
+        """
+
+        self.score_ballots()
+
+        return self.determine_winner_by_popular()
@@ -19,70 +19,203 @@
 | choice.
 | The systems are: Point Score, Remaining Candidates, Redistribution,
 | Voted-Weighted Systems
+|
+| Usage:
+|   python ranked_choice_voting.py            Interactive election.
+|   python ranked_choice_voting.py --interactive --audit-log audit.jsonl
+|   python -m ranked_choice_voting --candidates 5 --voters 100000 --seed 7
+|   python -m ranked_choice_voting --ballots cvr.csv --candidate-ids A,B,C \
+|       --system remaining --json
+|   python -m ranked_choice_voting --ballot-file cvr.bin --cache results/
 """
 
 # Import Libraries
+import argparse
+import contextlib
+import json
+import logging
+import sys
+import numpy as np
+from ballot_loader import load_ballots
+from ballot_store import BallotStore
 from election import Election
-from helpers import uid, show_output
+from events import audit_log, replay, set_verbosity
+from helpers import uid, MAX_CHOICES, MAX_BALLOT_DEPTH
+from instrumentation import Benchmark
+from result_cache import ResultCache, cached_tabulate, CACHE_MAX_BYTES
 
 from all_voting_sys_weighted import AllVotingWeightedSystem
-from popular_vote_sys import PopularVoteSystem
-from redistribution_sys import RedistributionSystem
-from rem_candidates_sys import RemainingCandidatesSystem
-from weighted_score_sys import WeightedScoreSystem
-
-
-### Run Program
-benchmark_id = uid(6)
-print(f'\n* Start Benchmark ID: {benchmark_id} *')
-
-# Create and run election
-elect = Election()
-elect.election_day()
-
-# Make copies of the candidates and ballots for each system. This is to ensure the original data is not modified.
-ballots = elect.ballots.copy()
-candidates = elect.candidates.copy()
-
-
-# Popular Vote System
-popular_candidates = candidates.copy()
-popular = PopularVoteSystem(popular_candidates, ballots.copy())
-popular.score_ballots()
-popular_candidates = popular.determine_winner_by_popular()
-elect.show_results('popular')
-elect.save_results(popular.title, popular_candidates)
-
-# Tally Weighted Score System
-weight_candidates = candidates.copy()
-weight = WeightedScoreSystem(weight_candidates, ballots.copy())
-weight.score_ballots()
-weight_candidates = weight.determine_winner_by_popular()
-elect.show_results()
-elect.save_results(weight.title, weight_candidates)
-
-# Tally Remaining Candidates System
-rem_candidates = candidates.copy()
-rem = RemainingCandidatesSystem(rem_candidates, ballots.copy())
-rem.score_ballots()
-#rem.determine_winner_by_majority()
-elect.show_results()
-elect.save_results(rem.title, rem_candidates)
-
-# Tally Redistribution System
-redistribution_candidates = candidates.copy()
-redistribution = RedistributionSystem(redistribution_candidates, ballots.copy())
-redistribution.score_ballots()
-#redistribution.determine_winner_by_majority()
-elect.show_results()
-elect.save_results(redistribution.title, redistribution_candidates)
-
-# Tally Average-Weighted Systems
-all_sys = AllVotingWeightedSystem(elect.results)
-all_sys.show_totals_by_sys()
-all_sys.determine_winner()
-
-# Show Results
-print(f'\n* End Benchmark ID: {benchmark_id} *')
-
-### End of Program
+from tabulation_runner import run_systems, tabulate, SYSTEMS
+
+
+BENCHMARK_LOG = 'benchmarks.jsonl' # Benchmark reports, one JSON object per run
+
+
+def run_interactive():
+    """
+    Prompt for the election, run every voting system and show the results.
+
+    :return: None
+    """
+
+    set_verbosity(logging.INFO)
+
+    benchmark_id = uid(6)
+    benchmark = Benchmark(benchmark_id)
+    print(f'\n* Start Benchmark ID: {benchmark_id} *')
+
+    # Create and run election
+    elect = Election()
+    elect.election_day(benchmark)
+
+    # Tally the Popular, Weighted Score, Remaining Candidates and Redistribution systems at the same time.
+    # Each system gets its own copy of the candidates and shares the read-only ballot store.
+    with benchmark.phase('tabulation'):
+        results = run_systems(elect, replay_records=False)
+
+    for result in results:
+        replay(result['records'], result['events'])
+        elect.show_results(result['title'], result['candidates'])
+        elect.save_results(result['title'], result['candidates'])
+        benchmark.record_system(result)
+
+    # Tally Average-Weighted Systems
+    with benchmark.phase('aggregation'):
+        all_sys = AllVotingWeightedSystem(elect.results)
+        all_sys.show_totals_by_sys()
+        all_sys.determine_winner()
+
+    # Show Results
+    benchmark.show()
+    benchmark.save(BENCHMARK_LOG)
+    print(f'\n* End Benchmark ID: {benchmark_id} *')
+
+
+def summarize(result):
+    """
+    Reduce a result to plain data for printing or JSON.
+
+    :param dict result: Result of tabulate().
+
+    :return: dict: Title, winner ID, each candidate's total, and each candidate's name and party.
+    """
+
+    total_key = 'sys_totals' if 'results' in result else 'total'
+
+    summary = {
+        'title': result['title'],
+        'winner_id': result['winner_id'],
+        'totals': {candidate.id: getattr(candidate, total_key) for candidate in result['candidates']},
+        'candidates': {
+            candidate.id: {'name': candidate.name, 'party': candidate.party} for candidate in result['candidates']
+        }
+    }
+
+    if 'results' in result:
+        summary['results'] = [summarize(system_result) for system_result in result['results']]
+
+    return summary
+
+
+def main(argv=None):
+    """
+    Command line entry point.  With no arguments, runs the interactive election.
+
+    :param list argv: Command line arguments (default: sys.argv).
+
+    :return: int: Exit status.
+    """
+
+    argv = sys.argv[1:] if argv is None else argv
+
+    parser = argparse.ArgumentParser(description='Tabulate a ranked choice election.')
+    parser.add_argument('--interactive', action='store_true', help='Run the interactive election (the default).')
+    parser.add_argument('--audit-log', help='Append audit events (tally, round, eliminate, winner) to this JSON lines file.')
+    parser.add_argument('--ballots', help='Cast vote record file (CSV, JSON lines or Parquet).')
+    parser.add_argument('--ballot-file', help='Binary ballot file written by Election.save_ballots().')
+    parser.add_argument('--no-header', action='store_true', help='The CSV ballot file has no header line.')
+    parser.add_argument('--candidate-ids', help='Comma separated candidate IDs in ballot code order.')
+    parser.add_argument('--candidates', type=int, help='Number of candidates for random ballots.')
+    parser.add_argument('--voters', type=int, help='Number of voters for random ballots.')
+    parser.add_argument('--seed', type=int, help='Seed for random ballots.')
+    parser.add_argument('--choices', type=int, default=MAX_CHOICES, help=f'Ranked choices per ballot (up to {MAX_BALLOT_DEPTH}).')
+    parser.add_argument('--system', default='all', choices=['all', *SYSTEMS], help='Voting system to tabulate.')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON.')
+    parser.add_argument('--cache', help='Directory of cached results; the same ballots are not tabulated twice.')
+    parser.add_argument('--cache-mb', type=int, default=CACHE_MAX_BYTES // 2 ** 20, help='Most MB cached per system.')
+    args = parser.parse_args(argv)
+
+    with audit_log(args.audit_log) if args.audit_log is not None else contextlib.nullcontext():
+        if len(argv) == 0 or args.interactive:
+            run_interactive()
+            return 0
+
+        return run_command(parser, args)
+
+
+def run_command(parser, args):
+    """
+    Tabulate the ballots given on the command line and print the result.
+
+    :param argparse.ArgumentParser parser: The command line parser, to report errors.
+    :param argparse.Namespace args: Parsed arguments.
+
+    :return: int: Exit status.
+    """
+
+    if not 1 <= args.choices <= MAX_BALLOT_DEPTH:
+        parser.error(f'--choices must be 1 to {MAX_BALLOT_DEPTH}')
+
+    if args.ballot_file is not None:
+        ballots = BallotStore.open(args.ballot_file)
+
+    elif args.ballots is not None:
+        if args.candidate_ids is None:
+            parser.error('--ballots needs --candidate-ids')
+
+        try:
+            ballots = load_ballots(
+                args.ballots, args.candidate_ids.split(','), choice_cnt=args.choices, header=not args.no_header
+            )[1]
+        except ValueError as error:
+            parser.error(str(error))
+
+    elif args.candidates is not None and args.voters is not None:
+        candidate_ids = args.candidate_ids.split(',') if args.candidate_ids else [f'c{i}' for i in range(args.candidates)]
+        ballots = BallotStore.generate(candidate_ids, args.voters, np.random.default_rng(args.seed), args.choices)
+
+    else:
+        parser.error('give --ballots, --ballot-file, or --candidates and --voters')
+
+    # A ballot file names its candidates; other ballots only have IDs.
+    candidates = ballots.make_candidates()
+
+    if args.cache is not None:
+        result = cached_tabulate(ResultCache(args.cache, args.cache_mb * 2 ** 20), ballots, candidates, args.system)
+    else:
+        result = tabulate(ballots, candidates, args.system)
+
+    summary = summarize(result)
+
+    if args.json:
+        print(json.dumps(summary))
+        return 0
+
+    for system_summary in summary.get('results', []) + [summary]:
+        # Bare IDs are their own names.
+        labels = {
+            candidate_id: candidate_id if candidate['name'] == candidate_id else
+            f'{candidate_id} - {candidate["name"]}' + (f' ({candidate["party"]})' if candidate['party'] else '')
+            for candidate_id, candidate in system_summary['candidates'].items()
+        }
+
+        print(f'{system_summary["title"]}: winner {labels.get(system_summary["winner_id"], system_summary["winner_id"])}')
+
+        for candidate_id, total in system_summary['totals'].items():
+            print(f'  {labels[candidate_id]}: {total}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,15 +7,21 @@
 | votes of the losing candidate and redistribute them to the remaining candidates.
 | Continue this process until a candidate receives more than half of the votes
 | to determine the winner.
+|
+| The ballots are scanned once, into a transfer tensor counting every
+| (choice, candidate -> next choice candidate) pair.  Each round then adds
+| one row of the tensor to the totals instead of scanning the ballots.
 """
 
-from helpers import map_id_to_candidate_index, sort_candidates, place_str, MAX_CHOICES, NO_VOTE_VAL, FIRST_CHOICE_INDEX
+import numpy as np
+from helpers import sort_candidates, FIRST_CHOICE_INDEX, IN_POOL
 from voting_sys import VotingSystem
 
 class RedistributionSystem(VotingSystem):
-    def __init__(self, candidates, ballots):
-        super().__init__(candidates, ballots)
+    def __init__(self, candidates, ballots, registry=None):
+        super().__init__(candidates, ballots, registry)
         self.title = 'Redistribution'
+        self.transfers = None # Transfer counts (choices - 1 x candidates x candidates), counted on first use unless set
         self.show_banner()
 
     def recount_ballots(self, vote_choice):
@@ -28,11 +34,9 @@ class RedistributionSystem(VotingSystem):
         """
 
         # Only count votes for candidates that are still in the pool.
-        for i in range(0, len(self.candidates)):
-            if self.candidates[i].is_winner is None:
-                #print('Before -> Candidate', self.candidates[i].id, 'Total:', self.candidates[i].total)
-                self.candidates[i].total += self.candidates[i].votes[vote_choice]
-                #print('After -> Candidate', self.candidates[i].id, 'Total:', self.candidates[i].total)
+        table = self.registry.table
+        in_pool = table.status == IN_POOL
+        table.totals[in_pool] += table.votes[in_pool, vote_choice]
 
 
     def score_ballots(self):
@@ -44,7 +48,7 @@ class RedistributionSystem(VotingSystem):
         """
 
         candidate_cnt = len(self.candidates)
-        choice_cnt = min(MAX_CHOICES, candidate_cnt)
+        choice_cnt = min(self.choice_cnt, candidate_cnt)
 
         self.recount_ballots(FIRST_CHOICE_INDEX)
         vote_choice = FIRST_CHOICE_INDEX
@@ -62,15 +66,17 @@ class RedistributionSystem(VotingSystem):
             #print(' Loser:', loser.id)
 
             # Apply loser votes to other candidates.
-            self.apply_loser_votes_to_other_candidates(loser, vote_choice)
+            votes_moved = self.apply_loser_votes_to_other_candidates(loser, vote_choice)
+            self.record_round(vote_choice + 1, loser, votes_moved)
 
             # Remove loser from candidate pool.
-            loser_index = self.candidates.index(loser)
-            self.candidates[loser_index].is_winner = False
+            self.eliminate_candidate(loser)
 
             # Note: No need to recount ballots as we only count when applying loser votes to other candidates!
             vote_choice += 1
 
+        self.round_cnt = vote_choice + 1
+
         # Order candidates by points descending
         self.candidates = sort_candidates(self.candidates)
 
@@ -82,35 +88,25 @@ class RedistributionSystem(VotingSystem):
         :param obj loser: The candidate that was eliminated.
         :param int choice: The choice that the loser was voted for.
 
-        :return: None
+        :return: int: Number of votes applied to other candidates.
         """
 
-        #print(f'  Applying loser {loser.id}\'s votes to other candidates...')
-
-        next_choice = choice + 1
-        #print(f'  Checking ballots for choice {choice}:', self.ballots)
-        for i in range (0, len(self.ballots)):
-            if self.ballots[i][choice] == loser.id:
-                #print(f'   Voter {i} voted for loser {loser.id} at {place_str(choice, "p")}')
-                if next_choice < MAX_CHOICES:
-                    next_choice_voted_id = self.ballots[i][next_choice]
-                    #print('   Next choice is candidate ID:', next_choice_voted_id)
-
-                    if next_choice_voted_id != NO_VOTE_VAL:
-                        next_choice_index = map_id_to_candidate_index(next_choice_voted_id, self.candidates)
-
-                        # Only apply losing votes to candidates that are still in the pool
-                        if self.candidates[next_choice_index].is_winner is None and self.candidates[next_choice_index].id != loser.id:
-                            self.candidates[next_choice_index].total += 1
-                            #print(f'   Voter {i} next choice went to {self.candidates[next_choice_index].id}. New total:', self.candidates[next_choice_index].total)
-
-                        else:
-                          #  print(f'  Can\'t apply losing vote {self.candidates[next_choice_index].id} as this candidate has already lost.')
-                            pass
-
-                    else:
-                        #print(f'   Voter {i} did not vote for {place_str(choice, "p")}.')
-                        pass
-                else:
-                    #print(f'  Warning: Next choice {next_choice} is out of range. Do nothing.')
-                    pass
+        # Ballots have no choice after this one.
+        if choice + 1 >= self.choice_cnt:
+            return 0
+
+        # Count every transfer once; each round is then a lookup of the loser's row.
+        if self.transfers is None:
+            self.transfers = self.ballots.transfer_counts()
+
+        loser_code = self.registry.index_of(loser.id)
+
+        # Only apply losing votes to candidates that are still in the pool
+        receivers = self.registry.table.status == IN_POOL
+        receivers[loser_code] = False
+
+        votes = np.where(receivers, self.transfers[choice, loser_code], 0)
+        self.registry.table.totals += votes
+        votes_moved = int(votes.sum())
+
+        return votes_moved
@@ -22,47 +22,96 @@
 | @link https://www.youtube.com/watch?v=oHRPMJmzBBw
 """
 
-from helpers import MAX_CHOICES, NO_VOTE_VAL, FIRST_CHOICE_INDEX, map_id_to_candidate_index, sort_candidates, place_str
+import numpy as np
+from helpers import FIRST_CHOICE_INDEX, sort_candidates
 from voting_sys import VotingSystem
 
 class RemainingCandidatesSystem(VotingSystem):
-    def __init__(self, candidates, ballots):
-        super().__init__(candidates, ballots)
+    """
+    Instant-runoff tabulation.  Ballots are grouped into piles by their current top choice, and each elimination
+    only moves the loser's pile to each ballot's next remaining choice.
+
+    Attributes:
+        piles (dict): Candidate index to a list of arrays of ballot row numbers; grouped on first use unless set.
+        positions (numpy.ndarray): Choice each ballot is currently counted for.
+    """
+
+    def __init__(self, candidates, ballots, registry=None):
+        super().__init__(candidates, ballots, registry)
 
         self.title = 'Remaining Candidates'
+        self.piles = {}
+        self.positions = None
         self.show_banner()
 
-    def recount_ballots(self):
+    def group_ballots(self):
         """
-        Count all first place votes to determine winner.
-        If no majority, count every voter's next choice votes and add to the total.
-        Calculate the majority vote with total ballots * choice value.
-        Example: Second round
-        voter_cnt = len(self.ballots)
+        Count all first place votes by putting each ballot in the pile of its first choice.
+        A ballot with a blank first choice is not counted.  Piles set beforehand (e.g. by a live tally) are only
+        totalled, not grouped again.
 
-        :param int round_num: The current round number.
+        :return: None
         """
 
-        # Reset total points for each candidate so we can count the first choice each round.
+        first_choices = self.ballots.rows()[:, FIRST_CHOICE_INDEX]
+
+        self.positions = np.zeros(len(first_choices), dtype=np.uint8)
         self.reset_candidate_totals()
 
-        for i in range(0, self.voter_cnt):
-            ballot = self.ballots[i]
+        if len(self.piles) > 0:
+            for code, pile in self.piles.items():
+                self.registry.get(code).total += self.ballots.weight_of(np.concatenate(pile))
+            return
+
+        self.add_to_piles(np.arange(len(first_choices)), first_choices)
+
+    def add_to_piles(self, rows, codes):
+        """
+        Add ballots to the piles of the candidates they are now counted for.
+
+        :param numpy.ndarray rows: Ballot row numbers.
+        :param numpy.ndarray codes: Candidate code each ballot is counted for.
+
+        :return: None
+        """
+
+        if len(rows) == 0:
+            return
+
+        order = np.argsort(codes, kind='stable')
+        rows, codes = rows[order], codes[order]
 
-            # Note: since we're removing the loser from the ballot, we only need to count the top row.
-            voted_id = ballot[FIRST_CHOICE_INDEX]
+        starts = np.flatnonzero(np.diff(codes)) + 1
+        pile_codes = codes[np.concatenate(([0], starts))]
 
-            if voted_id != NO_VOTE_VAL:
-                index = map_id_to_candidate_index(voted_id, self.candidates)
-                self.candidates[index].total += 1
-                #print('Round:', round_num, 'Voted ID:', voted_id, 'Total:', self.candidates[index].total)
-            else:
-                pass
-                #print(f'Voter {i} did not vote for {place_str(0, "p")}.')
+        for pile, code in zip(np.split(rows, starts), pile_codes):
+            if code == self.ballots.no_vote:
+                continue
 
-        #print('\nRound #', round_num)
-        #for candidate in self.candidates:
-        #    print(f'Candidate: {candidate.id} Total: {candidate.total}')
+            self.piles.setdefault(int(code), []).append(pile)
+            self.registry.get(code).total += self.ballots.weight_of(pile)
+
+    def transfer_loser_ballots(self, loser):
+        """
+        Move each of the loser's ballots to its next remaining choice.
+        Eliminated candidates are skipped; a blank choice or the end of the ballot exhausts it.
+
+        :param Candidate loser: The eliminated candidate.
+
+        :return: int: Number of ballots moved to another candidate.
+        """
+
+        code = self.registry.index_of(loser.id)
+        loser.total = 0
+
+        pile = self.piles.pop(code, [])
+        if len(pile) == 0:
+            return 0
+
+        rows, codes = self.next_live_choices(np.concatenate(pile), self.positions)
+        self.add_to_piles(rows, codes)
+
+        return self.ballots.weight_of(rows)
 
     def score_ballots(self):
         """
@@ -71,22 +120,25 @@ class RemainingCandidatesSystem(VotingSystem):
         """
 
         round_num = 1
-        self.recount_ballots()
+        self.group_ballots()
 
-        while self.determine_winner_by_majority(round_num) != True and round_num <= MAX_CHOICES:
+        while self.determine_winner_by_majority(round_num) != True and round_num <= len(self.candidates):
 
             # After tallying "new" totals, if there is still no majority, get the least voted candidate.
             loser = self.determine_loser()
+            if loser is None:
+                break
 
-            # Remove loser from candidate pool and from all ballots.
-            loser_index = self.candidates.index(loser)
-            self.candidates[loser_index].is_winner = False
+            # Remove loser from candidate pool.
+            self.eliminate_candidate(loser)
 
-            # Remove the loser candidate from all the ballots so they are not counted in the next round.
-            self.remove_loser_from_ballot(loser)
+            # Only the loser's ballots move to their next remaining choice.
+            ballots_moved = self.transfer_loser_ballots(loser)
+            self.record_round(round_num, loser, ballots_moved)
 
             round_num += 1
-            self.recount_ballots()
+
+        self.round_cnt = round_num
 
         # Order candidates by points descending
         self.candidates = sort_candidates(self.candidates)
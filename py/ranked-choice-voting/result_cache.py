@@ -0,0 +1,272 @@
+"""
+|--------------------------------------------------------------------------
+| Result Cache
+|--------------------------------------------------------------------------
+| Tabulation results kept on disk, keyed by what they depend on: a content
+| hash of the ballot store, the candidate table and the voting system (and
+| any system parameters), plus a hash of the tabulation code itself, so a
+| code change never serves results counted the old way.  Reports that
+| re-tabulate the same certified ballots get the stored result back instead
+| of counting again.
+|
+| Each system has its own directory of entries, bounded in size: when a
+| directory grows past the limit, the least recently used entries are
+| removed.  An entry's modification time is its last use.
+|
+| Partial tallies of shards are cached the same way (see sharded_tally), so
+| extending a sharded ballot set only recounts the shards that changed.
+"""
+
+# Import Libraries
+import functools
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import numpy as np
+from tabulation_runner import fresh_candidates, tabulate
+
+CACHE_MAX_BYTES = 256 * 1024 * 1024 # Most bytes of entries kept per system
+CACHE_FORMAT = 1 # Bump when the layout of cached values changes
+
+
+@functools.lru_cache(maxsize=None)
+def code_fingerprint():
+    """
+    Hash the source of the tabulation code, so results counted by older code are never served.
+
+    :return: string: Hex digest of every module beside this one.
+    """
+
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            digest.update(name.encode())
+
+            with open(os.path.join(directory, name), 'rb') as file:
+                digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+def fingerprint_store(store):
+    """
+    Hash the contents of a ballot store: candidate table, ballot depth, ballot rows and weights.
+
+    :param BallotStore store: The ballots.
+
+    :return: string: Hex digest.
+    """
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        'candidate_ids': store.candidate_ids,
+        'choice_cnt': store.choice_cnt,
+        'dtype': store.rows().dtype.str,
+        'weighted': store.weights is not None
+    }).encode())
+
+    digest.update(np.ascontiguousarray(store.rows()))
+
+    if store.weights is not None:
+        digest.update(np.ascontiguousarray(store.weights, dtype=np.int64))
+
+    return digest.hexdigest()
+
+
+def result_key(ballots_fingerprint, candidates, system, params=None):
+    """
+    Build the cache key of a tabulation.  The key also covers the cache format and the tabulation code.
+
+    :param string ballots_fingerprint: Hash of the ballot store (see fingerprint_store).
+    :param list candidates: Candidates, or candidate IDs.
+    :param string system: Name of the voting system.
+    :param dict params: Anything else the result depends on, such as system weights (optional).
+
+    :return: string: Hex digest.
+    """
+
+    key = json.dumps({
+        'ballots': ballots_fingerprint,
+        'candidates': [[candidate.id, candidate.name, candidate.party] for candidate in fresh_candidates(candidates)],
+        'system': system,
+        'params': params or {},
+        'format': CACHE_FORMAT,
+        'code': code_fingerprint()
+    }, sort_keys=True, default=str)
+
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Size-bounded, least recently used cache of results on disk, one directory per system.
+
+    Attributes:
+        path (string): Cache directory.
+        max_bytes (int): Most bytes of entries kept per system.
+        hits (int): Lookups that found an entry.
+        misses (int): Lookups that did not.
+    """
+
+    def __init__(self, path, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.path, exist_ok=True)
+
+    def entry_path(self, system, key):
+        """
+        Get the file of an entry.
+
+        :param string system: Name of the voting system (the entry's directory).
+        :param string key: Cache key.
+
+        :return: string: Path to the entry.
+        """
+
+        return os.path.join(self.path, system, f'{key}.pkl')
+
+    def get(self, system, key):
+        """
+        Look up an entry and mark it as used.
+
+        :param string system: Name of the voting system.
+        :param string key: Cache key.
+
+        :return: The cached value, or None if there isn't one.
+        """
+
+        path = self.entry_path(system, key)
+
+        try:
+            with open(path, 'rb') as file:
+                value = pickle.load(file)
+
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        except Exception:
+            # A damaged or stale entry (truncated, or naming a class that has since moved) is dropped and counted
+            # again.  Unpickling can raise almost anything, so every error is a miss.
+            self.remove(path)
+            self.misses += 1
+            return None
+
+        # Another job may evict the entry at the same moment; the value read is still good.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+
+        return value
+
+    def put(self, system, key, value):
+        """
+        Store an entry, then remove the least recently used entries of the system past the size limit.
+
+        :param string system: Name of the voting system.
+        :param string key: Cache key.
+        :param value: The value to store (picklable).
+
+        :return: None
+        """
+
+        directory = os.path.join(self.path, system)
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file and rename it, so other jobs never read a partial entry.
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(handle, 'wb') as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(temp_path, self.entry_path(system, key))
+
+        self.evict(system)
+
+    def evict(self, system):
+        """
+        Remove the least recently used entries of a system until it fits in max_bytes.
+
+        :param string system: Name of the voting system.
+
+        :return: int: Number of entries removed.
+        """
+
+        directory = os.path.join(self.path, system)
+
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.name.endswith('.pkl'):
+                # Skip entries another job removes while this one scans.
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        removed_cnt = 0
+
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+
+            if self.remove(path):
+                removed_cnt += 1
+
+            total_bytes -= size
+
+        return removed_cnt
+
+    @staticmethod
+    def remove(path):
+        """
+        Remove an entry, unless another job already has.
+
+        :param string path: Path to the entry.
+
+        :return: bool: True if this call removed it.
+        """
+
+        try:
+            os.remove(path)
+        except OSError:
+            return False
+
+        return True
+
+
+def cached_tabulate(cache, ballots, candidates, system='all'):
+    """
+    Tabulate like tabulation_runner.tabulate, but return the cached result if these ballots, candidates and system
+    have been tabulated before.
+
+    :param ResultCache cache: The cache.
+    :param BallotStore ballots: Ballots of the election.
+    :param list candidates: Candidates, or candidate IDs, in ballot code order.
+    :param string system: A name in SYSTEMS, a VotingSystem subclass, or 'all'.
+
+    :return: dict: The system's result.
+    """
+
+    system_name = system if isinstance(system, str) else system.__name__
+    key = result_key(fingerprint_store(ballots), candidates, system_name)
+
+    result = cache.get(system_name, key)
+
+    if result is None:
+        result = tabulate(ballots, candidates, system)
+        cache.put(system_name, key, result)
+
+    return result
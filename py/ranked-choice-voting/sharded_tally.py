@@ -0,0 +1,236 @@
+"""
+|--------------------------------------------------------------------------
+| Sharded Tally
+|--------------------------------------------------------------------------
+| Count an election the way it is really counted: per precinct or county.
+| Each ballot carries a shard key, and each shard is counted on its own into
+| a partial tally: its rank-count matrix and its unique-ranking table.
+|
+| Partial tallies merge associatively (counts add, ranking tables combine
+| their weights), so shards can be counted in any order, on worker processes
+| here or on other machines, and merged in any grouping: one at a time as
+| they arrive (merge), or all at once (combine).  The merged tally is
+| then tabulated centrally by every voting system; the runoff rounds are run
+| again on the merged ranking table, since eliminations depend on all ballots.
+"""
+
+# Import Libraries
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ballot_store import BallotStore
+from helpers import CandidateRegistry
+from result_cache import fingerprint_store, result_key
+from tabulation_runner import VOTING_SYSTEMS, fresh_candidates, run_system
+
+PARTIAL_TALLY = 'PartialTally' # Cache directory of shard counts
+
+
+class PartialTally:
+    """
+    Counts of one or more shards of an election.
+
+    Attributes:
+        shard_keys (tuple): Keys of the shards counted, sorted.
+        rank_counts (numpy.ndarray): Vote counts (candidates x choices) in code order.
+        rankings (BallotStore): Unique rankings of the shards and their weights.
+    """
+
+    def __init__(self, shard_keys, rank_counts, rankings):
+        self.shard_keys = tuple(sorted(shard_keys))
+        self.rank_counts = rank_counts
+        self.rankings = rankings
+
+    @classmethod
+    def count(cls, shard_key, store):
+        """
+        Count one shard's ballots.
+
+        :param string shard_key: The shard, e.g. a precinct ID.
+        :param BallotStore store: Ballots of the shard.
+
+        :return: PartialTally: The shard's counts.
+        """
+
+        rankings = store.compress()
+
+        return cls((shard_key,), rankings.rank_counts(), rankings)
+
+    def merge(self, other):
+        """
+        Combine the counts of two disjoint sets of shards.
+
+        :param PartialTally other: Counts of other shards.
+
+        :return: PartialTally: Counts of both.
+
+        :raises: ValueError: If the tallies share a shard or their candidate tables or ballot depths differ.
+        """
+
+        if self.rankings.candidate_ids != other.rankings.candidate_ids \
+                or self.rankings.choice_cnt != other.rankings.choice_cnt:
+            raise ValueError('Partial tallies have different candidates or ballot depths.')
+
+        shared = set(self.shard_keys) & set(other.shard_keys)
+        if len(shared) > 0:
+            raise ValueError(f'Shards counted twice: {sorted(shared)}')
+
+        return PartialTally(
+            self.shard_keys + other.shard_keys,
+            self.rank_counts + other.rank_counts,
+            BallotStore.merge([self.rankings, other.rankings])
+        )
+
+    @classmethod
+    def combine(cls, partials):
+        """
+        Combine the counts of many disjoint sets of shards at once.  The ranking tables are concatenated and
+        compressed once, instead of re-compressing the growing table at every pairwise merge.
+
+        :param list partials: Partial tallies.
+
+        :return: PartialTally: Counts of all of them.
+
+        :raises: ValueError: If the tallies share a shard or their candidate tables or ballot depths differ.
+        """
+
+        first = partials[0].rankings
+
+        for partial in partials[1:]:
+            if partial.rankings.candidate_ids != first.candidate_ids or partial.rankings.choice_cnt != first.choice_cnt:
+                raise ValueError('Partial tallies have different candidates or ballot depths.')
+
+        shard_keys = [shard_key for partial in partials for shard_key in partial.shard_keys]
+        if len(set(shard_keys)) != len(shard_keys):
+            shared = {shard_key for shard_key in shard_keys if shard_keys.count(shard_key) > 1}
+            raise ValueError(f'Shards counted twice: {sorted(shared)}')
+
+        return cls(
+            shard_keys,
+            np.sum([partial.rank_counts for partial in partials], axis=0),
+            BallotStore.merge([partial.rankings for partial in partials])
+        )
+
+    def ballot_cnt(self):
+        """
+        Get the number of ballots counted.
+
+        :return: int: Number of ballots.
+        """
+
+        return self.rankings.ballot_cnt()
+
+
+def shard_ballots(store, shard_keys):
+    """
+    Split a ballot store by the shard key of each ballot.
+
+    :param BallotStore store: Ballots of the election.
+    :param list shard_keys: Shard key of each ballot row.
+
+    :return: dict: Shard key to a store of its ballots, by key.
+
+    :raises: ValueError: If there isn't one shard key per ballot row.
+    """
+
+    if len(shard_keys) != store.row_cnt:
+        raise ValueError(f'Expected {store.row_cnt} shard keys, got {len(shard_keys)}.')
+
+    keys, inverse = np.unique(np.asarray(shard_keys), return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    # One stable sort groups the rows of every shard.
+    order = np.argsort(inverse, kind='stable')
+    starts = np.searchsorted(inverse[order], np.arange(len(keys) + 1))
+
+    shards = {}
+    for i, key in enumerate(keys):
+        rows = order[starts[i]:starts[i + 1]]
+
+        shard = BallotStore(store.candidate_ids, 0, store.choice_cnt)
+        shard.matrix = store.rows()[rows]
+        shard.row_cnt = len(rows)
+        shard.weights = None if store.weights is None else store.weights[rows]
+
+        shards[key.item()] = shard
+
+    return shards
+
+
+def count_shards(shards, workers=None, cache=None):
+    """
+    Count each shard on a process pool and merge the partial tallies.  With a cache, only shards whose ballots are
+    not already cached are counted.
+
+    :param dict shards: Shard key to a store of its ballots.
+    :param int workers: Number of worker processes (default: one per core).
+    :param ResultCache cache: Cache of partial tallies (optional).
+
+    :return: PartialTally: Counts of every shard.
+
+    :raises: ValueError: If there are no shards.
+    """
+
+    if len(shards) == 0:
+        raise ValueError('No shards to count.')
+
+    partials = {}
+    keys = {}
+
+    if cache is not None:
+        for shard_key, store in shards.items():
+            keys[shard_key] = result_key(fingerprint_store(store), [], PARTIAL_TALLY, {'shard_key': shard_key})
+            partial = cache.get(PARTIAL_TALLY, keys[shard_key])
+
+            if partial is not None:
+                partials[shard_key] = partial
+
+    stale_keys = [shard_key for shard_key in shards if shard_key not in partials]
+
+    if len(stale_keys) > 0:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counted = executor.map(PartialTally.count, stale_keys, [shards[shard_key] for shard_key in stale_keys])
+
+            for shard_key, partial in zip(stale_keys, counted):
+                partials[shard_key] = partial
+
+                if cache is not None:
+                    cache.put(PARTIAL_TALLY, keys[shard_key], partial)
+
+    return PartialTally.combine([partials[shard_key] for shard_key in shards])
+
+
+def tabulate_shards(shards, candidates, systems=VOTING_SYSTEMS, workers=None, cache=None):
+    """
+    Count the shards independently, merge them and tabulate the election with each voting system.
+    With a cache, unchanged shards and results are not counted again.
+
+    :param dict shards: Shard key to a store of its ballots.
+    :param list candidates: Candidates, or candidate IDs.
+    :param list systems: VotingSystem subclasses to run.
+    :param int workers: Number of worker processes for counting (default: one per core).
+    :param ResultCache cache: Cache of partial tallies and results (optional).
+
+    :return: tuple: Merged PartialTally and one result per system.
+    """
+
+    tally = count_shards(shards, workers, cache)
+
+    registry = CandidateRegistry.for_store(fresh_candidates(candidates), tally.rankings, tally.rank_counts)
+
+    if cache is None:
+        return tally, [run_system(system_cls, registry, tally.rankings) for system_cls in systems]
+
+    fingerprint = fingerprint_store(tally.rankings)
+    results = []
+
+    for system_cls in systems:
+        key = result_key(fingerprint, candidates, system_cls.__name__)
+        result = cache.get(system_cls.__name__, key)
+
+        if result is None:
+            result = run_system(system_cls, registry, tally.rankings)
+            cache.put(system_cls.__name__, key, result)
+
+        results.append(result)
+
+    return tally, results
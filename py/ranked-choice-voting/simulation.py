@@ -0,0 +1,162 @@
+"""
+|--------------------------------------------------------------------------
+| Election Simulation
+|--------------------------------------------------------------------------
+| Run thousands of synthetic elections through every voting system to study
+| how often the systems disagree.  Scenarios vary the number of candidates,
+| the number of voters and the abstention rate.  Each election draws from its
+| own random stream spawned from one seed, so a run is reproducible with any
+| number of worker processes.
+|
+| Reported per system: winner agreement with every other system, average
+| rounds and average runtime.
+"""
+
+# Import Libraries
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from all_voting_sys_weighted import AllVotingWeightedSystem
+from ballot_store import BallotStore
+from helpers import Candidate, CandidateRegistry, FIRST_CHOICE_INDEX, MIN_CANDIDATES, MAX_CANDIDATES, NO_VOTE_PCT_THRESHOLD, PERCENTILE
+from tabulation_runner import VOTING_SYSTEMS, run_system
+
+ALL_SYSTEMS_TITLE = 'All Weighted System'
+
+
+def scenario_grid(candidate_cnts, voter_cnts, no_vote_pcts):
+    """
+    Build every combination of candidate count, voter count and abstention rate.
+
+    :param list candidate_cnts: Numbers of candidates.
+    :param list voter_cnts: Numbers of voters.
+    :param list no_vote_pcts: Odds (in PERCENTILE) of leaving a choice blank.
+
+    :return: list: Scenario dicts.
+    """
+
+    return [
+        {'candidate_cnt': candidate_cnt, 'voter_cnt': voter_cnt, 'no_vote_pct': no_vote_pct}
+        for candidate_cnt, voter_cnt, no_vote_pct in itertools.product(candidate_cnts, voter_cnts, no_vote_pcts)
+    ]
+
+
+def simulate_election(scenario, seed_seq):
+    """
+    Generate one election and run it through every voting system and the all-systems weighting.
+
+    :param dict scenario: Candidate count, voter count and abstention rate.
+    :param numpy.random.SeedSequence seed_seq: Random stream for this election.
+
+    :return: dict: The scenario plus each system's winner ID, rounds and runtime.
+    """
+
+    rng = np.random.default_rng(seed_seq)
+    candidates = [Candidate(f'c{i}', f'Candidate {i}', 'No-Party Affiliation') for i in range(scenario['candidate_cnt'])]
+    ballots = BallotStore.generate(
+        [candidate.id for candidate in candidates], scenario['voter_cnt'], rng, no_vote_pct=scenario['no_vote_pct']
+    )
+
+    registry = CandidateRegistry.for_store(candidates, ballots)
+
+    record = dict(scenario, winners={}, round_cnts={}, runtimes={})
+    results = []
+
+    for system_cls in VOTING_SYSTEMS:
+        result = run_system(system_cls, registry, ballots)
+
+        record['runtimes'][result['title']] = result['runtime']
+        record['winners'][result['title']] = result['winner_id']
+        record['round_cnts'][result['title']] = result['round_cnt']
+        results.append(result)
+
+    start = time.perf_counter()
+    all_sys = AllVotingWeightedSystem(results)
+    all_sys.score_ballots()
+    all_sys.determine_winner()
+
+    record['runtimes'][ALL_SYSTEMS_TITLE] = time.perf_counter() - start
+    record['winners'][ALL_SYSTEMS_TITLE] = all_sys.candidates[FIRST_CHOICE_INDEX].id
+    record['round_cnts'][ALL_SYSTEMS_TITLE] = 1
+
+    return record
+
+
+def run_simulation(scenarios, trials, seed=None, workers=None):
+    """
+    Simulate every scenario `trials` times across a process pool.
+
+    :param list scenarios: Scenario dicts.
+    :param int trials: Elections per scenario.
+    :param int seed: Seed for the random streams (optional).
+    :param int workers: Number of worker processes (default: one per core).
+
+    :return: list: One record per election.
+    """
+
+    elections = [scenario for scenario in scenarios for _ in range(trials)]
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(elections))
+    chunk_size = max(1, len(elections) // (4 * (workers or os.cpu_count() or 1)))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(simulate_election, elections, seed_seqs, chunksize=chunk_size))
+
+
+def summarize(records):
+    """
+    Aggregate simulation records.
+
+    :param list records: One record per election.
+
+    :return: dict: Election count, and per system its agreement rate with every other system, average rounds and
+        average runtime.
+    """
+
+    titles = list(records[0]['winners'])
+    summary = {'election_cnt': len(records), 'systems': {}}
+
+    for title in titles:
+        summary['systems'][title] = {
+            'agreement': {
+                other: sum(record['winners'][title] == record['winners'][other] for record in records) / len(records)
+                for other in titles if other != title
+            },
+            'avg_rounds': sum(record['round_cnts'][title] for record in records) / len(records),
+            'avg_runtime': sum(record['runtimes'][title] for record in records) / len(records),
+            'no_winner_cnt': sum(record['winners'][title] is None for record in records)
+        }
+
+    return summary
+
+
+def show_summary(summary):
+    """
+    Output a simulation summary.
+
+    :param dict summary: Summary from summarize().
+
+    :return: None
+    """
+
+    print(f'\n--- Simulation: {summary["election_cnt"]} elections ---')
+
+    for title, stats in summary['systems'].items():
+        print(f'\n* {title} *')
+        print(f'Average rounds: {stats["avg_rounds"]:.2f}')
+        print(f'Average runtime: {stats["avg_runtime"] * 1000:.3f} ms')
+        print(f'Elections without a winner: {stats["no_winner_cnt"]}')
+
+        for other, rate in stats['agreement'].items():
+            print(f'Same winner as {other}: {rate * PERCENTILE:.1f}%')
+
+
+if __name__ == '__main__':
+    grid = scenario_grid(
+        [MIN_CANDIDATES, 4, MAX_CANDIDATES],
+        [100, 1000, 10000],
+        [0, NO_VOTE_PCT_THRESHOLD, 10]
+    )
+
+    show_summary(summarize(run_simulation(grid, trials=20, seed=2025)))
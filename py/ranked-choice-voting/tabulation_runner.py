@@ -0,0 +1,210 @@
+"""
+|--------------------------------------------------------------------------
+| Tabulation Runner
+|--------------------------------------------------------------------------
+| Run several voting systems over the same election at the same time.  Each
+| system gets its own snapshot of the candidate registry (a fork of its
+| arrays, see CandidateRegistry.fork) and a read-only view of the shared
+| ballot store, and returns a structured result:
+|   {'title': ..., 'winner_id': ..., 'round_cnt': ..., 'round_stats': [...],
+|    'candidates': [...], 'runtime': ...}
+|
+| Systems log their banners and messages and emit audit events (see events);
+| in a process pool the workers record them, return them under the result's
+| 'records' and 'events' and the parent replays them, one system at a time.
+|
+| In a process pool, every worker maps the ballots from one ballot file: a
+| store opened from a file is reopened from it, and an in-memory store is
+| first written to a temporary ballot file.  A thread pool shares the store
+| directly.
+|
+| tabulate() is the library entry point: ballots and candidates in, result
+| out, with no prompts and no console output of its own.
+"""
+
+# Import Libraries
+import contextlib
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from all_voting_sys_weighted import AllVotingWeightedSystem
+from ballot_store import BallotStore
+from condorcet_sys import CondorcetSystem
+from events import log, listening, recording, replay
+from helpers import Candidate, CandidateRegistry, FIRST_CHOICE_INDEX
+from popular_vote_sys import PopularVoteSystem
+from redistribution_sys import RedistributionSystem
+from rem_candidates_sys import RemainingCandidatesSystem
+from weighted_score_sys import WeightedScoreSystem
+
+VOTING_SYSTEMS = [PopularVoteSystem, WeightedScoreSystem, RemainingCandidatesSystem, RedistributionSystem]
+
+# Voting systems by name, for tabulate() and the command line.
+SYSTEMS = {
+    'popular': PopularVoteSystem,
+    'weighted': WeightedScoreSystem,
+    'remaining': RemainingCandidatesSystem,
+    'redistribution': RedistributionSystem,
+    'condorcet': CondorcetSystem
+}
+
+
+def fresh_candidates(candidates):
+    """
+    Copy candidates (or make them from bare IDs), so tabulating does not change the caller's.
+
+    :param list candidates: Candidates, or candidate IDs.
+
+    :return: list: New candidates in the same order.
+    """
+
+    return [
+        Candidate(candidate.id, candidate.name, candidate.party) if isinstance(candidate, Candidate)
+        else Candidate(candidate, candidate, '')
+        for candidate in candidates
+    ]
+
+
+def run_system(system_cls, registry, ballots, prepare=None):
+    """
+    Run one voting system on its own snapshot of the candidates.
+
+    :param type system_cls: VotingSystem subclass to run.
+    :param CandidateRegistry registry: Candidates of the election in ballot code order.
+    :param BallotStore ballots: Ballots of the election.
+    :param callable prepare: Called with the system before it tabulates, e.g. to hand it counts kept elsewhere.
+
+    :return: dict: The system's result.
+    """
+
+    registry = registry.fork()
+
+    start = time.perf_counter()
+
+    system = system_cls(list(registry.candidates), ballots, registry)
+
+    if prepare is not None:
+        prepare(system)
+
+    system.tabulate()
+
+    result = system.result()
+    result['runtime'] = time.perf_counter() - start
+
+    return result
+
+
+def run_recorded(system_cls, registry, ballots, level, keep_events):
+    """
+    Run one voting system in a worker process, keeping its log records and audit events for the parent to replay.
+
+    :param type system_cls: VotingSystem subclass to run.
+    :param CandidateRegistry registry: Candidates of the election in ballot code order.
+    :param BallotStore ballots: Ballots of the election.
+    :param int level: The parent's logging level.
+    :param bool keep_events: Keep audit events (the parent has listeners).
+
+    :return: dict: The system's result, with its log records under 'records' and its events under 'events'.
+    """
+
+    with recording(level, keep_events) as recorder:
+        result = run_system(system_cls, registry, ballots)
+
+    result['records'] = recorder.records
+    result['events'] = recorder.events
+
+    return result
+
+
+def run_systems(election, systems=VOTING_SYSTEMS, workers=None, executor='process', replay_records=True):
+    """
+    Run voting systems concurrently over an election's ballots.
+
+    :param Election election: Election that has been voted and tallied.
+    :param list systems: VotingSystem subclasses to run.
+    :param int workers: Size of the pool (default: one per system).
+    :param string executor: 'process' or 'thread'.
+    :param bool replay_records: Replay each worker's log records and audit events here, in order.  If False, the
+        caller replays result['records'] and result['events'] (e.g. to show each system's log next to its results).
+
+    :return: list: One result per system, in the order given.
+    """
+
+    if executor != 'process':
+        with ThreadPoolExecutor(max_workers=workers or len(systems)) as pool:
+            futures = [
+                pool.submit(run_system, system_cls, election.registry, election.ballots) for system_cls in systems
+            ]
+
+            # Threads log and emit directly, so there is nothing to replay.
+            return [dict(future.result(), records=[], events=[]) for future in futures]
+
+    with contextlib.ExitStack() as stack:
+        ballots = election.ballots
+
+        # Workers share the ballots through the page cache instead of each getting a pickled copy.
+        if ballots.source is None:
+            directory = stack.enter_context(tempfile.TemporaryDirectory())
+            ballots.save(os.path.join(directory, 'ballots.bin'))
+            ballots = BallotStore.open(os.path.join(directory, 'ballots.bin'))
+
+        pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers or len(systems)))
+        futures = [
+            pool.submit(run_recorded, system_cls, election.registry, ballots, log.getEffectiveLevel(), listening())
+            for system_cls in systems
+        ]
+
+        results = [future.result() for future in futures]
+
+    # Replay each system's log and events in order, so the systems' output isn't interleaved.
+    if replay_records:
+        for result in results:
+            replay(result['records'], result['events'])
+
+    return results
+
+
+def tabulate(ballots, candidates, system='all'):
+    """
+    Tabulate ballots with one voting system, or with every system weighted together.
+    Nothing is prompted, and the candidates passed in are not changed.  The systems only log (see events), so
+    nothing is printed unless verbosity is switched on, and several threads can tabulate at once.
+
+    :param BallotStore ballots: Ballots of the election, or lists of candidate IDs.
+    :param list candidates: Candidates, or candidate IDs, in ballot code order.
+    :param string system: A name in SYSTEMS, a VotingSystem subclass, or 'all'.
+
+    :return: dict: The system's result.  For 'all', the All Weighted System's result with each system's result under
+        'results'.
+
+    :raises: ValueError: If the system is unknown.
+    """
+
+    if isinstance(system, str) and system != 'all' and system not in SYSTEMS:
+        raise ValueError(f'Unknown voting system: {system}')
+
+    candidates = fresh_candidates(candidates)
+
+    if not isinstance(ballots, BallotStore):
+        ballots = BallotStore.from_lists(ballots, [candidate.id for candidate in candidates])
+
+    registry = CandidateRegistry.for_store(candidates, ballots)
+
+    if system != 'all':
+        system_cls = SYSTEMS[system] if isinstance(system, str) else system
+        return run_system(system_cls, registry, ballots)
+
+    results = [run_system(system_cls, registry, ballots) for system_cls in VOTING_SYSTEMS]
+
+    all_sys = AllVotingWeightedSystem(results)
+    all_sys.score_ballots()
+
+    ranked = sorted(all_sys.candidates, key=lambda candidate: candidate.sys_totals, reverse=True)
+
+    return {
+        'title': all_sys.title,
+        'winner_id': ranked[FIRST_CHOICE_INDEX].id if len(ranked) > 0 else None,
+        'candidates': ranked,
+        'results': results
+    }
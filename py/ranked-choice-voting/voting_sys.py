@@ -8,7 +8,10 @@
 """
 
 # Import Libraries
-from helpers import show_output, MAX_CHOICES, NO_VOTE_VAL, FIRST_CHOICE_INDEX, map_id_to_candidate_index, sort_candidates
+import numpy as np
+from ballot_store import BallotStore
+from events import log, emit
+from helpers import FIRST_CHOICE_INDEX, Candidate, CandidateRegistry, sort_candidates
 
 class VotingSystem:
     """
@@ -17,21 +20,45 @@ class VotingSystem:
     Attributes:
         title (str): The title of the voting system.
         candidates (list): A list of candidates in the election.
-        ballots (list): A list of ballots cast in the election.
+        ballots (BallotStore): The ballots cast in the election.
+        registry (CandidateRegistry): Candidate lookups by ballot code and ID.
+        eliminated (numpy.ndarray): True for every eliminated candidate, indexed by ballot code.
         winner_id (int): The ID of the winning candidate.
         majority (int): The majority vote needed to win the election.
         voter_cnt (int): The number of voters in the election.
         choice_vals (list): Weighted choice values for each place.
+        choice_cnt (int): Number of ranked choices on each ballot.
+        round_cnt (int): Number of counting rounds the system ran.
+        round_stats (list): Candidate eliminated and ballots moved in each elimination round.
     """
 
-    def __init__(self, candidates, ballots):
+    def __init__(self, candidates, ballots, registry=None):
         self.title = ''
         self.candidates = candidates
-        self.ballots = ballots
+
+        # Systems read ballots from a read-only view of the store, so one store can be shared; wrap plain ballot lists.
+        if not isinstance(ballots, BallotStore):
+            ballots = BallotStore.from_lists(ballots, [candidate.id for candidate in candidates])
+
+        self.ballots = ballots.read_only()
+
+        # Registry indexes must match the ballot codes.  Copies are registered (a new view of each candidate's row moves
+        # into the registry's table), so the caller's candidates stay in their own table and keep their totals.
+        if registry is None:
+            copies = [Candidate.view(candidate.table, candidate.index) for candidate in candidates]
+            registry = CandidateRegistry(sorted(copies, key=lambda candidate: self.ballots.codes[candidate.id]))
+            self.candidates = copies
+
+        self.registry = registry
+        self.eliminated = np.zeros(len(self.ballots.candidate_ids), dtype=bool)
+
         self.winner_id = None
         self.voter_cnt = len(ballots)
         self.majority = round(self.voter_cnt / 2)
         self.choice_vals = []
+        self.choice_cnt = self.ballots.choice_cnt # Ranked choices per ballot
+        self.round_cnt = 1
+        self.round_stats = []
 
     def show_banner(self):
         """
@@ -41,8 +68,8 @@ class VotingSystem:
         title_val = f'\n- {self.title.upper()} VOTING SYSTEM -'
         title_len = len(title_val)
 
-        print(title_val)
-        print('-' * title_len)
+        log.info(title_val)
+        log.info('-' * title_len)
 
     @staticmethod
     def declare_winner(name):
@@ -50,9 +77,9 @@ class VotingSystem:
         Output the winner of the election.
         """
 
-        print('\n----- WINNER -----')
-        print('', name)
-        print('------------------')
+        log.info('\n----- WINNER -----')
+        log.info(' %s', name)
+        log.info('------------------')
 
     def determine_loser(self):
         """
@@ -66,17 +93,17 @@ class VotingSystem:
         # Get the candidate with the fewest votes.
         pool_of_candidates = self.get_pool_of_candidates()
 
-        if show_output is True:
-            print('Pool of candidates left:', len(pool_of_candidates))
+        log.debug('Pool of candidates left: %d', len(pool_of_candidates))
 
         # If there is only one candidate left, declare them the winner by technicality.
         if len(pool_of_candidates) == 1:
             winning_candidate = pool_of_candidates[FIRST_CHOICE_INDEX]
             winning_candidate.is_winner = True
             self.winner_id = winning_candidate.id
+            emit('winner', lambda: {'system': self.title, 'candidate_id': winning_candidate.id, 'majority': False})
 
-            print('Only one candidate left:', winning_candidate.id)
-            print('No candidate has won a majority.  Declaring remaining candidate winner by technicality.')
+            log.info('Only one candidate left: %s', winning_candidate.id)
+            log.info('No candidate has won a majority.  Declaring remaining candidate winner by technicality.')
 
             return None
 
@@ -114,15 +141,56 @@ class VotingSystem:
             candidate = self.break_tie(candidates, 'max', FIRST_CHOICE_INDEX)
 
         if candidate is not None:
+            self.winner_id = candidate.id
+            emit('winner', lambda: {'system': self.title, 'candidate_id': candidate.id, 'majority': False})
             self.declare_winner(candidate.name)
 
         else:
-            print('* No winner found *')
+            log.info('* No winner found *')
 
         self.candidates = sort_candidates(self.candidates)
 
         return self.candidates
 
+    def tabulate(self):
+        """
+        Run the whole voting system: score the ballots and determine the winner.
+
+        :return: list: Candidates ordered by total points.
+        """
+
+        self.score_ballots()
+
+        return self.candidates
+
+    def result(self):
+        """
+        Get the outcome of the voting system.
+
+        :return: dict: Title, winner ID and candidates ordered by total points.
+        """
+
+        return {
+            'title': self.title,
+            'winner_id': self.winner_id,
+            'round_cnt': self.round_cnt,
+            'round_stats': self.round_stats,
+            'candidates': self.candidates
+        }
+
+    def record_round(self, round_num, loser, ballots_moved):
+        """
+        Record the work done in an elimination round.
+
+        :param int round_num: The round number.
+        :param Candidate loser: The eliminated candidate.
+        :param int ballots_moved: Number of ballots (votes) moved to other candidates.
+
+        :return: None
+        """
+
+        self.round_stats.append({'round': round_num, 'eliminated_id': loser.id, 'ballots_moved': ballots_moved})
+
     def determine_winner_by_majority(self, round_num):
         """
         Determines winner by majority.
@@ -133,20 +201,28 @@ class VotingSystem:
         """
 
         #print('Majority to win: ', self.majority)
-        print('Round #', round_num)
+        log.info('Round # %d', round_num)
+        emit('round', lambda: {
+            'system': self.title,
+            'round': round_num,
+            'majority': self.majority,
+            'totals': {candidate.id: candidate.total for candidate in self.candidates}
+        })
+
         for i in range (0, len(self.candidates)):
 
             # Output results.
-            print('Debug: Candidate:', self.candidates[i].id, 'Total:', self.candidates[i].total)
+            log.debug('Debug: Candidate: %s Total: %s', self.candidates[i].id, self.candidates[i].total)
 
             if self.candidates[i].total > self.majority:
                 self.candidates[i].is_winner = True
                 self.winner_id = self.candidates[i].id
+                emit('winner', lambda: {'system': self.title, 'candidate_id': self.winner_id, 'majority': True})
 
                 self.declare_winner(self.candidates[i].name)
                 return True
 
-        print('* No winner found *\n')
+        log.info('* No winner found *\n')
         return False
 
     @staticmethod
@@ -185,9 +261,10 @@ class VotingSystem:
         else:
             return [min(candidates, key=lambda c: c.votes[choice])]
 
-    def remove_loser_from_ballot(self, loser):
+    def eliminate_candidate(self, loser):
         """
-        Remove the losing candidate from the ballot.
+        Remove the losing candidate from contention.
+        Ballots are not changed; choices for eliminated candidates are skipped when ballots are read.
 
         :param loser:
             Candidate: The losing candidate.
@@ -195,10 +272,44 @@ class VotingSystem:
         :return:
         """
 
-        for i in range (0, len(self.ballots)):
-            for j in range(len(self.ballots[i]) - 1, -1, -1):
-                if self.ballots[i][j] == loser.id:
-                    self.ballots[i].pop(j) # Remove candidate from contention
+        loser.is_winner = False
+        self.eliminated[self.registry.index_of(loser.id)] = True
+
+        log.debug('Eliminated candidate: %s', loser.id)
+        emit('eliminate', lambda: {'system': self.title, 'candidate_id': loser.id, 'total': loser.total})
+
+    def next_live_choices(self, rows, positions):
+        """
+        Move ballots to their next choice for a candidate still in contention.
+        Choices for eliminated candidates are skipped; a blank choice or the end of the ballot exhausts it.
+
+        :param numpy.ndarray rows: Ballot row numbers.
+        :param numpy.ndarray positions: Choice each ballot is counted for; advanced in place.
+
+        :return: tuple: Row numbers and candidate codes of the ballots that are not exhausted.
+        """
+
+        ballots = self.ballots.rows()
+        live_rows = []
+        live_codes = []
+
+        while len(rows) > 0:
+            positions[rows] += 1
+            rows = rows[positions[rows] < self.ballots.choice_cnt]
+
+            codes = ballots[rows, positions[rows]]
+            marked = codes != self.ballots.no_vote
+            rows, codes = rows[marked], codes[marked]
+
+            skipped = self.eliminated[codes]
+            live_rows.append(rows[~skipped])
+            live_codes.append(codes[~skipped])
+            rows = rows[skipped]
+
+        if len(live_rows) == 0:
+            return rows, ballots[rows, FIRST_CHOICE_INDEX]
+
+        return np.concatenate(live_rows), np.concatenate(live_codes)
 
     def get_pool_of_candidates(self):
         """
@@ -215,8 +326,7 @@ class VotingSystem:
         Reset the total points for each candidate so we can count the first choice each round.
         """
 
-        for candidate in self.candidates:
-            candidate.total = 0
+        self.registry.table.totals[:] = 0
 
     def break_tie(self, candidates, mode, choice):
         """
@@ -232,70 +342,44 @@ class VotingSystem:
 
         choice += 1
 
-        if choice < MAX_CHOICES:
-            while len(candidates) > 1 and choice < MAX_CHOICES:
-
-                if mode == 'min':
-                    candidates = self.get_lowest_voted_candidate(candidates, 'votes', choice)
-
-                elif mode == 'max':
-                    candidates = self.get_highest_voted_candidate(candidates, 'votes', choice)
-
-                # If there are still multiple candidates with the same number of votes, break the tie again.
-                candidates = self.break_tie(candidates, mode, choice)
+        if choice >= self.choice_cnt:
+            log.warning('Warning: Out of choices and still no clear winner.')
+            return None
 
-            # Finally, only one candidate left.
-            if len(candidates) == 1:
-                return candidates[FIRST_CHOICE_INDEX]
+        # Keep every candidate tied at the highest/lowest count for this choice.
+        pick = min if mode == 'min' else max
+        tie_votes = pick(candidate.votes[choice] for candidate in candidates)
+        candidates = [candidate for candidate in candidates if candidate.votes[choice] == tie_votes]
 
-            print('Warning: No clear winner.')
-            return None
+        # Finally, only one candidate left.
+        if len(candidates) == 1:
+            return candidates[FIRST_CHOICE_INDEX]
 
-        else:
-            print('Warning: Out of choices and still no clear winner.')
-            return None
+        # If there are still multiple candidates with the same number of votes, break the tie again.
+        return self.break_tie(candidates, mode, choice)
 
     # Used in Weighted System
     def break_tie_weighted(self, tied_candidates, choice):
         """
-        Break the tie by comparing the next choice voted for count.
-        Note: We can break a tie with the highest or lowest total points.
+        Break a tie in weighted points by comparing the next choice voted for count, starting with `choice`.
+        Vote counts are integers, so the tie is broken the same way however the ballots were counted.
 
         :param [] tied_candidates:  List or candidates to compare.
         :param int choice: Choice Number
 
-        :return: Int winner_id: The candidate with the highest/lowest votes.
+        :return: Int winner_id: The candidate with the most votes, or None if still tied after the last choice.
         """
-        if show_output is True:
-            print('Breaking weighted tie...')
+        log.debug('Breaking weighted tie...')
 
-        winner_id = None
-        tie_breaker_total = 0
-        next_tied_candidates = []
-
-        # If there is a tie in total points break the tie with whom got the most first place votes.
-        for i in range (0, len(tied_candidates)):
-            candidate = tied_candidates[i]
-            total = 0
-
-            for j in range (0, len(self.choice_vals)):
-                total += candidate.votes[j] * self.choice_vals[j]
-                candidate.total += total
-
-                if total > tie_breaker_total:
-                    tie_breaker_total = total
-                    winner_id = candidate.id
-
-                elif total == tie_breaker_total:
-                    next_tied_candidates.append(candidate)
-
-        # Recursion
-        if len(next_tied_candidates) > 0:
+        if choice >= len(tied_candidates[FIRST_CHOICE_INDEX].votes):
+            return None
 
-            # Update the place value (started at 1st) and break the tie again.
-            next_choice = choice + 1
+        # If there is a tie in total points break the tie with whom got the most votes for this choice.
+        tie_votes = max(candidate.votes[choice] for candidate in tied_candidates)
+        next_tied_candidates = [candidate for candidate in tied_candidates if candidate.votes[choice] == tie_votes]
 
-            if next_choice < MAX_CHOICES:
-                winner_id = self.break_tie_weighted(next_tied_candidates, next_choice)
+        if len(next_tied_candidates) == 1:
+            return next_tied_candidates[FIRST_CHOICE_INDEX].id
 
-        return winner_id
+        # Recursion: update the place value and break the tie again.
+        return self.break_tie_weighted(next_tied_candidates, choice + 1)
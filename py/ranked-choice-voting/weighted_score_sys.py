@@ -4,28 +4,36 @@
 |--------------------------------------------------------------------------
 | This is a system where you rank the candidates in order of preference.
 | first place votes are weighted by 1, second place votes are weighted by 1/2,
-| third place votes are weighted by 1/3, and fourth place votes are weighted by 1/4.
+| third place votes are weighted by 1/4, and fourth place votes are weighted by 1/8
+| (each further rank is worth half the one before; other weights can be given).
 | Multiply the number of votes by the weight and add them up to determine the
 | winner.
 |
+| Points are counted as integers: the weights times a common scale (8 for the
+| default weights).  Scores are exact, so serial, chunked and parallel counts
+| always agree, and ties are found by exact comparison.  When a score could
+| outgrow int64 (large scales times many ballots), the points are counted as
+| Python integers instead.
+|
 | Note: No candidates are eliminated until the final round.
 """
 
-from helpers import map_id_to_candidate_index, sort_candidates, FIRST_CHOICE_INDEX, show_output
+import numpy as np
+from events import log, emit
+from helpers import fixed_point_weights, FIRST_CHOICE_INDEX, MAX_INT64
 from voting_sys import VotingSystem
 
 class WeightedScoreSystem(VotingSystem):
-    def __init__(self, candidates, ballots):
-        super().__init__(candidates, ballots) # constructor of parent class
+    def __init__(self, candidates, ballots, registry=None, weights=None):
+        super().__init__(candidates, ballots, registry) # constructor of parent class
         self.title = 'Weighted Score'
 
-        # Define weighted choice values for each place.
-        self.choice_vals = [
-            1,     # 1st Place
-            1 / 2, # 2nd Place
-            1 / 4, # 3rd Place
-            1 / 8  # 4th Place
-        ]
+        # Define weighted choice values for each place: 1st 1, 2nd 1/2, 3rd 1/4, 4th 1/8, ...
+        self.choice_vals = weights if weights is not None else [1 / 2 ** choice for choice in range(self.ballots.choice_cnt)]
+
+        # Integer points per place and their scale, e.g. [8, 4, 2, 1] / 8.
+        self.points, self.scale = fixed_point_weights(self.choice_vals)
+        self.scores = np.zeros(len(self.registry), dtype=np.int64)
 
         self.show_banner()
 
@@ -34,10 +42,61 @@ class WeightedScoreSystem(VotingSystem):
         Score candidate points based on votes ranked by choice.
         """
 
+        # Every candidate's points at once: votes per rank times the integer points of each rank.
+        table = self.registry.table
+        rank_cnt = min(len(self.points), table.votes.shape[1])
+        votes, points = table.votes[:, :rank_cnt], self.points[:rank_cnt]
+
+        # int64 overflows silently, so count in exact Python integers if the largest possible score might not fit.
+        bound = int(votes.sum(axis=1).max(initial=0)) * int(np.abs(points).max(initial=0))
+        if bound > MAX_INT64 or points.dtype == object:
+            votes, points = votes.astype(object), points.astype(object)
+
+        self.scores = votes @ points
+        table.totals = (self.scores / self.scale).astype(np.float64)
+
         for i in range (0, len(self.candidates)):
-            self.candidates[i].total = 0
+            log.info('Candidate: %s Total: %s', self.candidates[i].id, self.candidates[i].total)
+
+    def tabulate(self):
+        """
+        Score the ballots and determine the winner by the highest total.
+
+        :return: list: Candidates ordered by total points.
+        """
+
+        self.score_ballots()
+
+        return self.determine_winner_by_points()
+
+    def determine_winner_by_points(self):
+        """
+        Determine the winner by the highest points.
+        Ties are found on the integer scores and broken by the tied candidates' votes, first choice first.
+
+        :return: list: Candidates ordered by total points.
+        """
+
+        winner_id = None
+
+        if len(self.scores) > 0:
+            tied_candidates = [self.registry.get(index) for index in np.flatnonzero(self.scores == self.scores.max())]
+
+            if len(tied_candidates) == 1:
+                winner_id = tied_candidates[FIRST_CHOICE_INDEX].id
+            else:
+                winner_id = self.break_tie_weighted(tied_candidates, FIRST_CHOICE_INDEX)
+
+        if winner_id is not None:
+            winner = self.registry.find(winner_id)
+            self.winner_id = winner_id
+            emit('winner', lambda: {'system': self.title, 'candidate_id': winner_id, 'majority': False})
+            self.declare_winner(winner.name)
+
+        else:
+            log.info('* No winner found *')
 
-            for j in range (0, len(self.choice_vals)):
-                self.candidates[i].total += self.candidates[i].votes[j] * self.choice_vals[j]
+        # Winner first among equal totals.
+        self.candidates = sorted(self.candidates, key=lambda candidate: (candidate.total, candidate.id == winner_id), reverse=True)
 
-            print(f'Candidate: {self.candidates[i].id} Total: {self.candidates[i].total}')
+        return self.candidates